@@ -1,5 +1,7 @@
 VERSION = '0.3.10'
 
+default_app_config = 'rest_framework_swagger.apps.RestFrameworkSwaggerConfig'
+
 DEFAULT_SWAGGER_SETTINGS = {
     'exclude_url_names': [],
     'exclude_namespaces': [],
@@ -16,6 +18,18 @@ DEFAULT_SWAGGER_SETTINGS = {
     'resource_access_handler': None,
     'template_path': 'rest_framework_swagger/index.html',
     'doc_expansion': 'none',
+    'cache_enabled': False,
+    'cache_alias': None,
+    'cache_timeout': None,
+    'cache_lease_timeout': 60,
+    'cache_soft_timeout': None,
+    'cache_hard_timeout': None,
+    'cache_warm_up_paths': [],
+    'cache_pruned_builds': 32,
+    'prerender_response': True,
+    'precompressed_encodings': ['br', 'gzip'],
+    'spec_file': None,
+    'introspection_workers': None,
 }
 
 
@@ -35,6 +49,11 @@ def reload_settings(*args, **kwargs):
     setting, value = kwargs['setting'], kwargs['value']
     if setting == 'SWAGGER_SETTINGS':
         load_settings(value)
+    if setting in ('SWAGGER_SETTINGS', 'ROOT_URLCONF'):
+        from .speccache import spec_cache
+        from .urlparser import endpoint_registry
+        spec_cache.clear()
+        endpoint_registry.clear()
 
 try:  # Django settings are not configured when installing: import settings will fail
     from django.conf import settings
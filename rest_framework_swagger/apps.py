@@ -0,0 +1,39 @@
+import os
+import sys
+
+from django.apps import AppConfig
+
+import rest_framework_swagger as rfs
+
+# Management commands which serve requests, and so are warmed up for
+SERVING_COMMANDS = ('runserver',)
+
+
+def get_management_command(argv=None):
+    """
+    Returns the name of the management command the process runs, or None
+    when it is not run by manage.py or django-admin
+    """
+    argv = sys.argv if argv is None else argv
+    if len(argv) > 1 and os.path.basename(argv[0]) in (
+            'manage.py', 'django-admin', 'django-admin.py'):
+        return argv[1]
+    return None
+
+
+class RestFrameworkSwaggerConfig(AppConfig):
+    name = 'rest_framework_swagger'
+    verbose_name = 'Django REST Swagger'
+
+    def ready(self):
+        paths = rfs.SWAGGER_SETTINGS.get('cache_warm_up_paths')
+        if not paths:
+            return
+        command = get_management_command()
+        if command is not None and command not in SERVING_COMMANDS:
+            return
+
+        from . import speccache
+        if speccache.is_cache_enabled():
+            from .views import warm_up_cache
+            warm_up_cache(paths)
@@ -62,6 +62,14 @@ except ImportError:
                                        % (module, attr))
         return view
 
+try:
+    from django.core.cache import caches
+
+    def get_cache(alias):
+        return caches[alias]
+except ImportError:
+    from django.core.cache import get_cache  # noqa
+
 
 def get_pagination_attribures(view):
     if StrictVersion(rest_framework.VERSION) >= StrictVersion('3.1.0'):
@@ -84,3 +92,10 @@ def get_pagination_attribures(view):
             view.paginate_by_param
 
     return page_size, page_query_param, page_size_query_param
+
+
+# libyaml's loader is much faster, when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as YAMLSafeLoader  # noqa
+except ImportError:
+    from yaml import SafeLoader as YAMLSafeLoader  # noqa
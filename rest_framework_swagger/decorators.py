@@ -2,6 +2,8 @@ import types
 from django.utils import six
 from collections import namedtuple
 
+from .introspectors import YAML_ATTRIBUTE, load_yaml_from_docstring
+
 
 def serializer_class(clazz):
     def _get_serializer_class(self):
@@ -24,6 +26,35 @@ def serializer_class(clazz):
     return decorator
 
 
+def parse_docstring(obj):
+    """
+    Parses the YAML of a view, view method or @api_view function docstring
+    once, at import time, and stores it in its `swagger_yaml` attribute so
+    that requests don't parse it again. Views may also set `swagger_yaml`
+    to the object themselves.
+
+    Invalid YAML raises its YAMLError right away.
+
+    @parse_docstring
+    @api_view(['GET'])
+    def my_view(request):
+        '''
+        ---
+        omit_serializer: true
+        '''
+    """
+    parsed, error = load_yaml_from_docstring(obj.__doc__)
+    if error is not None:
+        raise error
+    parsed = parsed or {}
+
+    setattr(obj, YAML_ATTRIBUTE, parsed)
+    if hasattr(obj, 'cls'):
+        # @api_view only copies the docstring to the view it generates
+        setattr(obj.cls, YAML_ATTRIBUTE, parsed)
+    return obj
+
+
 unwrappage = namedtuple('unwrappage', ['closure', 'code'])
 
 
@@ -1,9 +1,14 @@
 """Generates API documentation by introspection."""
 import importlib
+import threading
+
 import rest_framework
+from django.db import connections
+from django.utils import six
 from rest_framework import viewsets
 from rest_framework.serializers import Serializer, BaseSerializer
 from rest_framework_swagger import SWAGGER_SETTINGS
+import rest_framework_swagger as rfs
 
 from .introspectors import (
     APIViewIntrospector,
@@ -13,7 +18,8 @@ from .introspectors import (
     WrappedAPIViewIntrospector,
     get_data_type,
     get_default_value,
-    get_primitive_type
+    get_primitive_type,
+    serializer_cache
 )
 from .compat import OrderedDict
 
@@ -43,19 +49,48 @@ class DocumentationGeneratorBase(object):
         # Response classes defined in docstrings
         self.explicit_response_types = dict()
 
+        # Guards the above while endpoints are introspected concurrently
+        self._lock = threading.RLock()
+
+        # URL patterns per view callback, for the last list of APIs
+        self._callback_patterns = (None, {})
+
+        # Serializers used by each path of the last list of APIs generated
+        self._generated_serializers = (None, {})
+
+    def get_callback_patterns(self, apis):
+        """
+        Returns the URL patterns of each view callback in a list of APIs.
+        The index is built once per list, rather than for every endpoint
+        of a ViewSet.
+        """
+        indexed_apis, index = self._callback_patterns
+        if indexed_apis is not apis:
+            index = {}
+            for api in apis or ():
+                index.setdefault(api['callback'], []).append(api['pattern'])
+            self._callback_patterns = (apis, index)
+        return index
+
 
     def get_introspector(self, api, apis):
         path = api['path']
         pattern = api['pattern']
         callback = api['callback']
+        path_parameters = api.get('path_parameters')
         if callback.__module__ == 'rest_framework.decorators':
-            return WrappedAPIViewIntrospector(callback, path, pattern, self.user)
+            return WrappedAPIViewIntrospector(
+                callback, path, pattern, self.user,
+                path_parameters=path_parameters)
         elif issubclass(callback, viewsets.ViewSetMixin):
-            patterns = [a['pattern'] for a in apis
-                        if a['callback'] == callback]
-            return ViewSetIntrospector(callback, path, pattern, self.user, patterns=patterns)
+            patterns = self.get_callback_patterns(apis).get(callback)
+            return ViewSetIntrospector(
+                callback, path, pattern, self.user, patterns=patterns,
+                path_parameters=path_parameters)
         else:
-            return APIViewIntrospector(callback, path, pattern, self.user)
+            return APIViewIntrospector(
+                callback, path, pattern, self.user,
+                path_parameters=path_parameters)
 
     def _get_response_serializer(self, method_inspector):
         """
@@ -97,12 +132,13 @@ class DocumentationGeneratorBase(object):
                 view=view_name,
                 method=method_inspector.method.title().replace('_', '')
             )
-            self.explicit_response_types.update({
-                response_type_name: {
-                    "id": response_type_name,
-                    "properties": response_type
-                }
-            })
+            with self._lock:
+                self.explicit_response_types.update({
+                    response_type_name: {
+                        "id": response_type_name,
+                        "properties": response_type
+                    }
+                })
             return response_type_name
         else:
             serializer_name = IntrospectorHelper.get_serializer_name(serializer)
@@ -116,29 +152,43 @@ class DocumentationGeneratorBase(object):
         Returns a set of serializer classes for a provided list
         of APIs
         """
-        serializers = set()
+        return set().union(*self._get_path_serializers(apis).values())
+
+    def _get_path_serializers(self, apis):
+        """
+        Returns the set of serializer classes each path of a list of APIs
+        uses
+        """
+        path_serializers = {}
 
         for api in apis:
+            serializers = path_serializers.setdefault(api['path'], set())
             introspector = self.get_introspector(api, apis)
             for method_introspector in introspector:
-                serializer = method_introspector.get_request_serializer_class()
-                if serializer is not None:
-                    serializers.add(serializer)
-                serializer = self._get_response_serializer(method_introspector)
-                if serializer is not None:
-                    serializers.add(serializer)
-                extras = method_introspector.get_extra_serializer_classes()
-                for extra in extras:
-                    if extra is not None:
-                        serializers.add(extra)
-
-                parser = method_introspector.get_yaml_parser()
-                for response in parser.get_responses(method_introspector.callback):
-                    if 'schema' in response and response['schema'] is not None:
-                        serializer = parser.load_serializer_class(response['schema'], method_introspector.callback)
-                        serializers.add(serializer)
-
-        return serializers
+                self._collect_serializers(method_introspector, serializers)
+
+        return path_serializers
+
+    def _collect_serializers(self, method_introspector, serializers):
+        """
+        Adds the serializer classes a method uses to serializers
+        """
+        serializer = method_introspector.get_request_serializer_class()
+        if serializer is not None:
+            serializers.add(serializer)
+        serializer = self._get_response_serializer(method_introspector)
+        if serializer is not None:
+            serializers.add(serializer)
+        extras = method_introspector.get_extra_serializer_classes()
+        for extra in extras:
+            if extra is not None:
+                serializers.add(extra)
+
+        parser = method_introspector.get_yaml_parser()
+        for response in parser.get_responses(method_introspector.callback):
+            if 'schema' in response and response['schema'] is not None:
+                serializer = parser.load_serializer_class(response['schema'], method_introspector.callback)
+                serializers.add(serializer)
 
     def _find_field_serializers(self, serializers, found_serializers=set()):
         """
@@ -153,7 +203,7 @@ class DocumentationGeneratorBase(object):
 
         serializers_set = set()
         for serializer in serializers:
-            fields = serializer().get_fields()
+            fields = serializer_cache.get_fields(serializer)
             for name, field in fields.items():
                 if isinstance(field, BaseSerializer) or isinstance(field, Serializer):
                     serializers_set.add(get_thing(field, lambda f: f))
@@ -167,15 +217,22 @@ class DocumentationGeneratorBase(object):
 
     def _get_serializer_fields(self, serializer):
         """
-        Returns serializer fields in the Swagger MODEL format
+        Returns serializer fields in the Swagger MODEL format. These are
+        computed once per serializer class, or per class of nested
+        serializer instances, and must not be modified.
         """
         if serializer is None:
             return
 
-        if hasattr(serializer, '__call__'):
-            fields = serializer().get_fields()
-        else:
-            fields = serializer.get_fields()
+        serializer_class = serializer
+        if not hasattr(serializer, '__call__'):
+            serializer_class = type(serializer)
+        return serializer_cache.get(
+            ('fields_schema', type(self), serializer_class),
+            lambda: self._build_serializer_fields(serializer))
+
+    def _build_serializer_fields(self, serializer):
+        fields = serializer_cache.get_fields(serializer)
 
         data = OrderedDict({
             'fields': OrderedDict(),
@@ -282,17 +339,86 @@ class DocumentationGenerator(DocumentationGeneratorBase):
 
     def generate(self, apis):
         """
-        Returns documentation for a list of APIs
+        Returns documentation for a list of APIs. The serializers they use
+        are collected along the way, so that get_models does not introspect
+        the same list of APIs again.
+
+        See the `introspection_workers` setting to introspect the APIs
+        concurrently.
         """
+        workers = rfs.SWAGGER_SETTINGS.get('introspection_workers') or 1
+        if workers > 1 and len(apis) > 1:
+            return self.generate_concurrently(apis, workers)
+
         api_docs = {}
+        path_serializers = {}
         for api in apis:
-            api_docs[api['path']] = self.get_operations(api, apis)
+            serializers = path_serializers.setdefault(api['path'], set())
+            api_docs[api['path']] = self.get_operations(api, apis, serializers)
 
+        self._generated_serializers = (apis, path_serializers)
         return api_docs
 
-    def get_operations(self, api, apis=None):
+    def generate_concurrently(self, apis, workers):
         """
-        Returns docs for the allowed methods of an API endpoint
+        Returns documentation for a list of APIs introspected by a pool of
+        worker threads. Operations are merged in URL order, like generate
+        does, while an API which fails is logged and left out.
+        """
+        # Built once, rather than by every worker at the same time
+        self.get_callback_patterns(apis)
+
+        queue = six.moves.queue.Queue()
+        for index, api in enumerate(apis):
+            queue.put((index, api))
+        results = [None] * len(apis)
+
+        def work():
+            try:
+                while True:
+                    try:
+                        index, api = queue.get_nowait()
+                    except six.moves.queue.Empty:
+                        return
+                    results[index] = self._get_isolated_operations(api, apis)
+            finally:
+                # Database connections are per thread, and closed once the
+                # worker is done with every API it introspected
+                for connection in connections.all():
+                    connection.close()
+
+        threads = [threading.Thread(target=work)
+                   for _ in range(min(workers, len(apis)))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        api_docs = {}
+        path_serializers = {}
+        for api, result in zip(apis, results):
+            if result is None:
+                continue
+            operations, api_serializers = result
+            api_docs[api['path']] = operations
+            path_serializers.setdefault(api['path'], set()).update(
+                api_serializers)
+
+        self._generated_serializers = (apis, path_serializers)
+        return api_docs
+
+    def _get_isolated_operations(self, api, apis):
+        serializers = set()
+        try:
+            return self.get_operations(api, apis, serializers), serializers
+        except Exception:
+            logger.exception("Could not introspect '%s'", api['path'])
+            return None
+
+    def get_operations(self, api, apis=None, serializers=None):
+        """
+        Returns docs for the allowed methods of an API endpoint, and adds
+        the serializer classes they use to serializers (optional)
         """
         if apis is None:
             apis = [api]
@@ -301,6 +427,9 @@ class DocumentationGenerator(DocumentationGeneratorBase):
         introspector = self.get_introspector(api, apis)
 
         for method_introspector in introspector:
+            if serializers is not None:
+                self._collect_serializers(method_introspector, serializers)
+
             if not isinstance(method_introspector, BaseMethodIntrospector) or \
                     method_introspector.get_http_method() == "OPTIONS":
                 continue  # No one cares. I impose JSON.
@@ -381,8 +510,13 @@ class DocumentationGenerator(DocumentationGeneratorBase):
         Builds a list of Swagger 'models'. These represent
         DRF serializers and their fields
         """
-        serializers = self._get_serializer_set(apis)
-        serializers.update(self.explicit_serializers)
+        generated_apis, path_serializers = self._generated_serializers
+        if generated_apis is apis:
+            serializers = set().union(*path_serializers.values())
+        else:
+            serializers = self._get_serializer_set(apis)
+        with self._lock:
+            serializers.update(self.explicit_serializers)
         serializers.update(
             self._find_field_serializers(serializers)
         )
@@ -424,10 +558,57 @@ class DocumentationGenerator(DocumentationGeneratorBase):
                 'required': [f for f in data['required'] if f in r_properties]
             }
 
-        models.update(self.explicit_response_types)
+        with self._lock:
+            models.update(self.explicit_response_types)
         models.update(self.fields_serializers)
         return models
 
+    def get_path_tags(self, apis):
+        """
+        Returns the names of the tags the operations of each path of a list
+        of APIs are grouped by, in order of appearance, without generating
+        their documentation
+        """
+        path_tags = {}
+        for api in apis:
+            tags = path_tags.setdefault(api['path'], [])
+            for method_introspector in self.get_introspector(api, apis):
+                if not isinstance(method_introspector, BaseMethodIntrospector) or \
+                        method_introspector.get_http_method() == "OPTIONS":
+                    continue
+                doc_parser = method_introspector.get_yaml_parser()
+                for tag in doc_parser.get_tags() or []:
+                    if tag not in tags:
+                        tags.append(tag)
+        return path_tags
+
+    def get_path_definitions(self, apis, paths, definitions):
+        """
+        Returns the names of the definitions each path uses. These are the
+        definitions of the serializers its methods were documented with,
+        which are described inline, of their nested serializers, and the
+        definitions the path refers to.
+
+        apis -- the list of APIs paths were generated for
+        paths -- Swagger paths, as returned by generate
+        definitions -- Swagger definitions, as returned by get_models
+        """
+        generated_apis, path_serializers = self._generated_serializers
+        if generated_apis is not apis:
+            path_serializers = self._get_path_serializers(apis)
+
+        path_definitions = {}
+        for path, operations in paths.items():
+            serializers = set(path_serializers.get(path, ()))
+            serializers.update(self._find_field_serializers(serializers))
+            names = set(IntrospectorHelper.get_serializer_name(serializer)
+                        for serializer in serializers)
+            names.intersection_update(definitions)
+            fragments = [operations] + [definitions[name] for name in names]
+            names.update(get_reachable_definitions(fragments, definitions))
+            path_definitions[path] = frozenset(names)
+        return path_definitions
+
     def _find_field_serializers(self, serializers, found_serializers=set()):
         """
         Returns set of serializers discovered from fields
@@ -443,7 +624,7 @@ class DocumentationGenerator(DocumentationGeneratorBase):
 
         serializers_set = set()
         for serializer in serializers:
-            fields = serializer().get_fields()
+            fields = serializer_cache.get_fields(serializer)
             for name, field in fields.items():
                 if rest_framework.VERSION >= '3.0.0' and (isinstance(field, ListSerializer) or isinstance(field, ListField)):
                     f = get_thing(field, lambda f: f)
@@ -460,3 +641,100 @@ class DocumentationGenerator(DocumentationGeneratorBase):
         return serializers_set
 
 
+DEFINITION_REF_PREFIX = '#/definitions/'
+
+# Records the definitions each path uses in documents written by the
+# generate_swagger command, see DocumentationGenerator.get_path_definitions
+PATH_DEFINITIONS_EXTENSION = 'x-path-definitions'
+
+
+def get_definition_refs(fragment):
+    """
+    Returns the names of the definitions a document fragment refers to
+    """
+    refs = set()
+    stack = [fragment]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            ref = item.get('$ref')
+            if isinstance(ref, six.string_types) and \
+                    ref.startswith(DEFINITION_REF_PREFIX):
+                refs.add(ref[len(DEFINITION_REF_PREFIX):])
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+    return refs
+
+
+def get_reachable_definitions(fragment, definitions):
+    """
+    Returns the names of the definitions a document fragment refers to,
+    directly or through other definitions
+    """
+    reachable = set()
+    pending = get_definition_refs(fragment)
+    while pending:
+        name = pending.pop()
+        if name in reachable or name not in definitions:
+            continue
+        reachable.add(name)
+        pending.update(get_definition_refs(definitions[name]))
+    return frozenset(reachable)
+
+
+def get_path_tags(document):
+    """
+    Returns the names of the tags the operations of each path of a Swagger
+    document are grouped by, in order of appearance
+    """
+    path_tags = {}
+    for path, operations in document['paths'].items():
+        tags = path_tags[path] = []
+        for operation in operations.values():
+            if not isinstance(operation, dict):
+                continue
+            for tag in operation.get('tags') or []:
+                if tag not in tags:
+                    tags.append(tag)
+    return path_tags
+
+
+def prune_document(document, paths, path_definitions=None):
+    """
+    Returns a copy of a Swagger document without some of its paths, nor
+    the definitions only those paths refer to. The document is not modified,
+    and fragments are shared with the copy.
+
+    document -- the Swagger document
+    paths -- paths to remove
+    path_definitions -- names of the definitions each path uses, see
+                        DocumentationGenerator.get_path_definitions. Defaults
+                        to those each path refers to.
+    """
+    definitions = document.get('definitions') or {}
+    if path_definitions is None:
+        path_definitions = dict(
+            (path, get_reachable_definitions(operations, definitions))
+            for path, operations in document['paths'].items())
+
+    kept_paths, kept_definitions, removed_definitions = {}, set(), set()
+    for path, operations in document['paths'].items():
+        if path in paths:
+            removed_definitions.update(path_definitions.get(path, ()))
+        else:
+            kept_paths[path] = operations
+            kept_definitions.update(path_definitions.get(path, ()))
+    removed_definitions -= kept_definitions
+
+    pruned = dict(document)
+    pruned['paths'] = kept_paths
+    pruned['definitions'] = dict(
+        (name, definition) for name, definition in definitions.items()
+        if name not in removed_definitions)
+    if PATH_DEFINITIONS_EXTENSION in document:
+        pruned[PATH_DEFINITIONS_EXTENSION] = dict(
+            (path, names)
+            for path, names in document[PATH_DEFINITIONS_EXTENSION].items()
+            if path in kept_paths)
+    return pruned
@@ -2,18 +2,22 @@
 
 """Handles the instrospection of REST Framework Views and ViewSets."""
 
+import copy
+import hashlib
 import inspect
 import itertools
 import re
+import threading
 import yaml
 import importlib
 
-from .compat import OrderedDict, strip_tags, get_pagination_attribures
+from .compat import OrderedDict, strip_tags, get_pagination_attribures, \
+    YAMLSafeLoader
 from abc import ABCMeta, abstractmethod
 
 from django.http import HttpRequest
 from django.contrib.admindocs.utils import trim_docstring
-from django.utils.encoding import smart_text
+from django.utils.encoding import force_bytes, smart_text
 
 import rest_framework
 from rest_framework import viewsets
@@ -33,6 +37,11 @@ except ImportError:
 
 import rest_framework_swagger as rfs
 
+# Attribute of views, view methods and @api_view functions holding the
+# object their docstring YAML is parsed into, see decorators.parse_docstring
+YAML_ATTRIBUTE = 'swagger_yaml'
+
+
 def get_view_description(view_cls, html=False, docstring=None):
     if docstring is not None:
         view_cls = type(
@@ -134,15 +143,19 @@ class IntrospectorHelper(object):
 class BaseViewIntrospector(object):
     __metaclass__ = ABCMeta
 
-    def __init__(self, callback, path, pattern, user):
+    def __init__(self, callback, path, pattern, user, path_parameters=None):
         self.callback = callback
         self.path = path
         self.pattern = pattern
         self.user = user
+        # Typed path parameters, as found by the UrlParser
+        self.path_parameters = path_parameters
+        self._yaml_parser = None
 
     def get_yaml_parser(self):
-        parser = YAMLDocstringParser(self)
-        return parser
+        if self._yaml_parser is None:
+            self._yaml_parser = YAMLDocstringParser(self)
+        return self._yaml_parser
 
     @abstractmethod
     def __iter__(self):
@@ -160,6 +173,13 @@ class BaseViewIntrospector(object):
     def get_docs(self):
         return get_view_description(self.callback)
 
+    def get_parsed_docs(self):
+        """
+        Returns the YAML of the class docstring when it was parsed ahead of
+        time. See decorators.parse_docstring.
+        """
+        return vars(self.callback).get(YAML_ATTRIBUTE)
+
 
 class BaseMethodIntrospector(object):
     __metaclass__ = ABCMeta
@@ -182,6 +202,7 @@ class BaseMethodIntrospector(object):
         self.callback = view_introspector.callback
         self.path = view_introspector.path
         self.user = view_introspector.user
+        self._yaml_parser = None
 
     @property
     def is_array_response(self):
@@ -202,14 +223,21 @@ class BaseMethodIntrospector(object):
                 % (list(missing_set), list(self.parent.methods())))
 
     def get_yaml_parser(self):
+        """
+        Returns the parser of the method docstring, merged over the one of
+        the view. It is only built once per method introspector.
+        """
+        if self._yaml_parser is not None:
+            return self._yaml_parser
         parser = YAMLDocstringParser(self)
-        parent_parser = YAMLDocstringParser(self.parent)
+        parent_parser = self.parent.get_yaml_parser()
         new_object = {}
         #self.check_yaml_methods(parent_parser.object.keys())
         #new_object.update(parent_parser.object.get(self.method, {}))
         new_object.update(parent_parser.object)
         new_object.update(parser.object)
         parser.object = new_object
+        self._yaml_parser = parser
         return parser
 
     def get_extra_serializer_classes(self):
@@ -341,6 +369,9 @@ class BaseMethodIntrospector(object):
     def get_docs(self):
         return ''
 
+    def get_parsed_docs(self):
+        return None
+
     def retrieve_docstring(self):
         """
         Attempts to fetch the docs for a class method. Returns None
@@ -352,10 +383,23 @@ class BaseMethodIntrospector(object):
 
         return get_view_description(getattr(self.callback, method))
 
+    def retrieve_parsed_docstring(self):
+        """
+        Returns the YAML of the class method docstring when it was parsed
+        ahead of time, if the method exists
+        """
+        method = str(self.method).lower()
+        return getattr(getattr(self.callback, method, None),
+                       YAML_ATTRIBUTE, None)
+
     def build_path_parameters(self):
         """
         Gets the parameters from the URL
         """
+        path_parameters = getattr(self.parent, 'path_parameters', None)
+        if path_parameters is not None:
+            return [dict(param) for param in path_parameters]
+
         url_params = re.findall('/{([^}]*)}', self.path)
         params = []
 
@@ -419,13 +463,19 @@ class BaseMethodIntrospector(object):
         """
         Builds form parameters from the serializer class
         """
-        data = []
         serializer = self.get_request_serializer_class()
 
         if serializer is None:
-            return data
+            return []
 
-        fields = serializer().get_fields()
+        # Copied, as parameters are completed by discover_parameters
+        return copy.deepcopy(serializer_cache.get(
+            ('body_parameters', type(self), serializer),
+            lambda: self.build_serializer_body_parameters(serializer)))
+
+    def build_serializer_body_parameters(self, serializer):
+        data = []
+        fields = serializer_cache.get_fields(serializer)
 
         has_form_data = False
         for name, field in fields.items():
@@ -652,6 +702,9 @@ class APIViewMethodIntrospector(BaseMethodIntrospector):
         """
         return self.retrieve_docstring()
 
+    def get_parsed_docs(self):
+        return self.retrieve_parsed_docstring()
+
 
 class WrappedAPIViewMethodIntrospector(BaseMethodIntrospector):
     def get_docs(self):
@@ -662,6 +715,9 @@ class WrappedAPIViewMethodIntrospector(BaseMethodIntrospector):
         """
         return get_view_description(self.callback)
 
+    def get_parsed_docs(self):
+        return vars(self.callback).get(YAML_ATTRIBUTE)
+
     def get_module(self):
         from rest_framework_swagger.decorators import wrapper_to_func
         func = wrapper_to_func(self.callback)
@@ -671,15 +727,18 @@ class WrappedAPIViewMethodIntrospector(BaseMethodIntrospector):
         return self.parent.get_notes()
 
     def get_yaml_parser(self):
-        parser = YAMLDocstringParser(self)
-        return parser
+        if self._yaml_parser is None:
+            self._yaml_parser = YAMLDocstringParser(self)
+        return self._yaml_parser
 
 
 class ViewSetIntrospector(BaseViewIntrospector):
     """Handle ViewSet introspection."""
 
-    def __init__(self, callback, path, pattern, user, patterns=None):
-        super(ViewSetIntrospector, self).__init__(callback, path, pattern, user)
+    def __init__(self, callback, path, pattern, user, patterns=None,
+                 path_parameters=None):
+        super(ViewSetIntrospector, self).__init__(
+            callback, path, pattern, user, path_parameters=path_parameters)
         if not issubclass(callback, viewsets.ViewSetMixin):
             raise Exception("wrong callback passed to ViewSetIntrospector")
         self.patterns = patterns or [pattern]
@@ -742,6 +801,9 @@ class ViewSetMethodIntrospector(BaseMethodIntrospector):
         """
         return self.retrieve_docstring()
 
+    def get_parsed_docs(self):
+        return self.retrieve_parsed_docstring()
+
     def create_view(self):
         view = super(ViewSetMethodIntrospector, self).create_view()
         if not hasattr(view, 'action'):
@@ -823,6 +885,132 @@ def normalize_data_format(data_type, data_format, obj):
         obj['format'] = data_format
 
 
+class YAMLCache(object):
+    """
+    Bounded LRU cache of parsed YAML blocks, keyed by a digest of their
+    content, so that docstrings shared by mixins and parent classes are
+    parsed once per process. Hits and misses are counted in `hits` and
+    `misses`.
+
+    maxsize -- number of YAML blocks kept (optional)
+    """
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._objects = OrderedDict()
+
+    def load(self, yaml_string):
+        """
+        Returns the object a YAML block is parsed into, along with the
+        YAMLError it failed with, if any
+        """
+        key = hashlib.sha1(force_bytes(yaml_string)).hexdigest()
+        with self._lock:
+            result = self._objects.pop(key, None)
+            if result is not None:
+                self._objects[key] = result
+                self.hits += 1
+                return result
+            self.misses += 1
+
+        try:
+            result = (yaml.load(yaml_string, Loader=YAMLSafeLoader), None)
+        except yaml.YAMLError as e:
+            result = (None, e)
+
+        with self._lock:
+            self._objects[key] = result
+            while len(self._objects) > self.maxsize:
+                self._objects.popitem(last=False)
+        return result
+
+    def __len__(self):
+        return len(self._objects)
+
+    def clear(self):
+        with self._lock:
+            self._objects.clear()
+            self.hits = self.misses = 0
+
+
+yaml_cache = YAMLCache()
+
+
+class SerializerCache(object):
+    """
+    Fields, schemas and body parameters computed per serializer class, which
+    only depend on the class. Instantiating a ModelSerializer and building
+    its fields from the model is done once per process, including for nested
+    serializers, which are cached under their class.
+
+    Cached values are shared, and must be copied by callers which modify
+    them.
+
+    Call clear() whenever serializer classes change, ie. between tests.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def get(self, key, build):
+        """
+        Returns the value cached under key, or caches the value returned by
+        build
+        """
+        with self._lock:
+            value = self._values.get(key)
+        if value is None:
+            value = build()
+            with self._lock:
+                self._values[key] = value
+        return value
+
+    def get_fields(self, serializer):
+        """
+        Returns the fields of a serializer class, or of a nested serializer
+        instance
+        """
+        if hasattr(serializer, '__call__'):
+            return self.get(('fields', serializer),
+                            lambda: serializer().get_fields())
+        return self.get(('fields', type(serializer)), serializer.get_fields)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+serializer_cache = SerializerCache()
+
+
+def load_yaml_from_docstring(docstring):
+    """
+    Returns the object the YAML block of a docstring is parsed into, or None
+    without one, along with the YAMLError it failed with, if any
+    """
+    split_lines = trim_docstring(docstring).split('\n')
+
+    # Cut YAML from rest of docstring
+    for index, line in enumerate(split_lines):
+        line = line.strip()
+        if line.startswith('---'):
+            cut_from = index
+            break
+    else:
+        return None, None
+
+    yaml_string = "\n".join(split_lines[cut_from:])
+    yaml_string = formatting.dedent(yaml_string)
+    return yaml_cache.load(yaml_string)
+
+
+# Parsed YAML of docstrings per introspector class, view callback and
+# method, shared between requests
+_docstring_objects = {}
+
+
 class YAMLDocstringParser(object):
     """
     Docstring parser powered by YAML syntax
@@ -972,31 +1160,36 @@ class YAMLDocstringParser(object):
 
     def __init__(self, method_introspector):
         self.method_introspector = method_introspector
-        self.object = self.load_obj_from_docstring(
-            docstring=self.method_introspector.get_docs())
+        self.object = self.method_introspector.get_parsed_docs()
+        if self.object is None:
+            self.object = self.load_cached_obj_from_docstring(
+                docstring=self.method_introspector.get_docs())
         if self.object is None:
             self.object = {}
 
-    def load_obj_from_docstring(self, docstring):
-        """Loads YAML from docstring"""
-        split_lines = trim_docstring(docstring).split('\n')
+    def load_cached_obj_from_docstring(self, docstring):
+        """
+        Loads YAML from docstring, once per view callback and method for as
+        long as its docstring stays the same
+        """
+        introspector = self.method_introspector
+        key = (type(introspector), getattr(introspector, 'callback', None),
+               getattr(introspector, 'method', None))
+        cached = _docstring_objects.get(key)
+        if cached is not None and cached[0] == docstring:
+            self.yaml_error = cached[2]
+            return cached[1]
 
-        # Cut YAML from rest of docstring
-        for index, line in enumerate(split_lines):
-            line = line.strip()
-            if line.startswith('---'):
-                cut_from = index
-                break
-        else:
-            return None
+        obj = self.load_obj_from_docstring(docstring)
+        _docstring_objects[key] = (docstring, obj, self.yaml_error)
+        return obj
 
-        yaml_string = "\n".join(split_lines[cut_from:])
-        yaml_string = formatting.dedent(yaml_string)
-        try:
-            return yaml.load(yaml_string)
-        except yaml.YAMLError as e:
-            self.yaml_error = e
-            return None
+    def load_obj_from_docstring(self, docstring):
+        """Loads YAML from docstring"""
+        obj, error = load_yaml_from_docstring(docstring)
+        if error is not None:
+            self.yaml_error = error
+        return obj
 
     def _load_class(self, cls_path, callback):
         """
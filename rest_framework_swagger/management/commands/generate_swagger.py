@@ -0,0 +1,65 @@
+import os
+from optparse import make_option
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from rest_framework_swagger.docgenerator import PATH_DEFINITIONS_EXTENSION
+from rest_framework_swagger.views import get_offline_view, JSONRenderer
+
+
+class Command(BaseCommand):
+    help = ("Generates the Swagger document and writes it to a file, "
+            "which can be served with the `spec_file` setting.")
+
+    option_list = BaseCommand.option_list + (
+        make_option('--urlconf', dest='urlconf', default=None,
+                    help='Urlconf to document. Defaults to ROOT_URLCONF.'),
+        make_option('--filter-path', dest='filter_path', default='',
+                    help='Path the documentation is served under, '
+                         'ie. /v1 for /v1/api-docs.'),
+        make_option('--user', dest='username', default=None,
+                    help='Username to introspect views and check resource '
+                         'access as. Defaults to the unauthenticated user.'),
+        make_option('-o', '--output', dest='output', default=None,
+                    help='File to write the document to. '
+                         'Defaults to stdout.'),
+    )
+
+    def handle(self, *args, **options):
+        path = options.get('filter_path') or ''
+        user = self.get_user(options.get('username'))
+
+        view = get_offline_view(path, user, options.get('urlconf'))
+        apis = view.get_apis(path)
+        document, path_definitions = view.generate_document(
+            path, apis, for_user=user)
+        # Lets resource documents and resource access leave out the
+        # definitions of the paths they prune, when the file is served
+        document[PATH_DEFINITIONS_EXTENSION] = dict(
+            (api_path, sorted(names))
+            for api_path, names in path_definitions.items())
+        content = JSONRenderer().render(document)
+
+        output = options.get('output')
+        if output is None:
+            self.stdout.write(content.decode('utf-8'))
+            return
+
+        # Written next to the output first, so that the document is replaced
+        # atomically while it is being served. Processes serving the file
+        # load the new one on their next request.
+        partial = output + '.partial'
+        with open(partial, 'wb') as spec_file:
+            spec_file.write(content)
+        os.rename(partial, output)
+
+    def get_user(self, username):
+        if username is None:
+            return None
+
+        user_model = get_user_model()
+        try:
+            return user_model._default_manager.get_by_natural_key(username)
+        except user_model.DoesNotExist:
+            raise CommandError("User '%s' does not exist" % username)
@@ -0,0 +1,707 @@
+"""Caches generated Swagger documents between requests."""
+import functools
+import hashlib
+import json
+import mmap
+import os
+import threading
+import time
+import warnings
+import zlib
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import six
+from django.utils.encoding import force_bytes, force_text
+from django.utils.functional import Promise
+from django.utils.http import quote_etag
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+import rest_framework_swagger as rfs
+from .compat import OrderedDict, get_cache
+from .docgenerator import get_reachable_definitions, prune_document, \
+    PATH_DEFINITIONS_EXTENSION
+
+
+def _stable_repr(obj):
+    """
+    JSON fallback for settings values which are not serializable, such as
+    handler callables. It must not differ between processes, for them to
+    agree on shared cache keys: values which can only be told apart by
+    their address are represented by their class, with a warning.
+    """
+    if isinstance(obj, Promise):
+        return force_text(obj)
+    if isinstance(obj, functools.partial):
+        return 'partial(%s)' % json.dumps(
+            [obj.func, obj.args, obj.keywords or {}], sort_keys=True,
+            default=_stable_repr)
+    if isinstance(obj, (set, frozenset)):
+        return sorted(json.dumps(item, sort_keys=True, default=_stable_repr)
+                      for item in obj)
+    if hasattr(obj, '__module__') and hasattr(obj, '__name__'):
+        return '%s.%s' % (obj.__module__, obj.__name__)
+    value = repr(obj)
+    if ' at 0x' in value:
+        cls = type(obj)
+        value = '%s.%s' % (cls.__module__, cls.__name__)
+        warnings.warn(
+            "%r can not be told apart from other %s instances in the "
+            "settings fingerprint" % (obj, value), RuntimeWarning)
+    return value
+
+
+def get_settings_fingerprint():
+    """
+    Returns a digest of the current SWAGGER_SETTINGS
+    """
+    dump = json.dumps(rfs.SWAGGER_SETTINGS, sort_keys=True,
+                      default=_stable_repr)
+    return hashlib.md5(dump.encode('utf-8')).hexdigest()
+
+
+def get_urlconf_name(urlconf=None):
+    """
+    Returns the dotted name of the urlconf a document is generated for
+    """
+    if urlconf is None:
+        urlconf = settings.ROOT_URLCONF
+    if isinstance(urlconf, six.string_types):
+        return urlconf
+    return getattr(urlconf, '__name__', repr(urlconf))
+
+
+def get_cache_key(urlconf=None, filter_path=None, resource=None):
+    """
+    Returns the key under which a document is cached.
+
+    urlconf -- urlconf module or dotted path (optional)
+    filter_path -- path the document is restricted to (optional)
+    resource -- top level resource the document is restricted to (optional)
+    """
+    key = (
+        get_urlconf_name(urlconf),
+        filter_path or '',
+        get_settings_fingerprint(),
+    )
+    if resource is not None:
+        key += (resource,)
+    return key
+
+
+def get_apis_fingerprint(apis):
+    """
+    Returns a digest of flattened URL patterns, as returned by
+    UrlParser.get_apis
+    """
+    digest = hashlib.md5()
+    for api in apis:
+        pattern = api['pattern']
+        line = '%s %s %s %s\n' % (
+            api['path'], pattern.regex.pattern, pattern.name,
+            _stable_repr(api['callback']))
+        digest.update(line.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def get_shared_cache_key(apis, filter_path=None, resource=None):
+    """
+    Returns the key under which a document is shared between processes.
+    It only depends on the URL patterns, the settings and the package
+    version so that every process serving the same code agrees on it.
+    """
+    digest = hashlib.md5()
+    for part in (rfs.VERSION, filter_path or '', resource or '',
+                 get_settings_fingerprint(), get_apis_fingerprint(apis)):
+        digest.update(part.encode('utf-8'))
+    return '%s:%s' % (SharedSpecCache.key_prefix, digest.hexdigest())
+
+
+def get_partition_name(api):
+    """
+    Returns the partition an API is cached in, which is the outermost
+    namespace of its URL pattern, or '' outside of any namespace.
+    """
+    namespaces = api.get('namespaces') or ()
+    return namespaces[0] if namespaces else ''
+
+
+def partition_apis(apis):
+    """
+    Groups flattened URL patterns by partition, in URL order. Without any
+    API, the document still has its empty partition outside of namespaces.
+    """
+    partitions = OrderedDict()
+    for api in apis:
+        partitions.setdefault(get_partition_name(api), []).append(api)
+    if not partitions:
+        partitions[''] = []
+    return partitions
+
+
+def get_partition_key(apis, filter_path=None, namespace='', generation=0):
+    """
+    Returns the key under which the paths and definitions of a partition
+    are cached. It depends on the partition's own URL patterns only, so that
+    documents which share a partition share its generation too.
+
+    generation -- number of times the namespace was invalidated, as
+                  returned by SharedSpecCache.get_generations
+    """
+    return ('partition', namespace, filter_path or '', generation,
+            get_settings_fingerprint(), get_apis_fingerprint(apis))
+
+
+def get_shared_partition_key(key):
+    """
+    Returns the key under which the partition of key, as returned by
+    get_partition_key, is shared between processes
+    """
+    digest = hashlib.md5()
+    for part in (rfs.VERSION,) + key:
+        digest.update(('%s\n' % part).encode('utf-8'))
+    return '%s:partition:%s' % (SharedSpecCache.key_prefix,
+                                digest.hexdigest())
+
+
+def compress_gzip(content):
+    compressor = zlib.compressobj(9, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(content) + compressor.flush()
+
+
+COMPRESSORS = {
+    'gzip': compress_gzip,
+}
+if brotli is not None:
+    COMPRESSORS['br'] = brotli.compress
+
+
+class SpecValidator(object):
+    """
+    What conditional requests for a build are answered with. It is shared
+    along with the build, so that processes can answer them without
+    fetching the build.
+
+    digest -- SHA1 digest of the content
+    encodings -- content codings the build is served with
+    created -- time the document was generated
+    """
+    def __init__(self, digest, encodings, created):
+        self.digest = digest
+        self.etag = quote_etag(digest)
+        self.encodings = encodings
+        self.created = created
+
+    def get_etag(self, encoding=None):
+        """
+        Returns the ETag of the content, or of one of its encodings
+        """
+        if encoding is None:
+            return self.etag
+        return quote_etag('%s-%s' % (self.digest, encoding))
+
+    def get_age(self):
+        """
+        Returns the number of seconds since the document was generated
+        """
+        return max(0, int(time.time() - self.created))
+
+
+class SpecBuild(SpecValidator):
+    """
+    A generated document, along with what is derived from it once per build.
+    Only the content is stored in the shared cache, and the document is
+    parsed from it when a process needs it.
+
+    document -- the Swagger document
+    renderer -- renderer instance the document is served with
+    encodings -- content codings to compress the content with (optional)
+    path_definitions -- names of the definitions each path uses (optional),
+                        see DocumentationGenerator.get_path_definitions
+    lazy -- compress the content the first time each encoding is served,
+            rather than up front
+    """
+    def __init__(self, document, renderer, encodings=None,
+                 path_definitions=None, lazy=False):
+        self._document = document
+        self._path_definitions = path_definitions
+        self.content = force_bytes(renderer.render(document))
+        self.created = time.time()
+        self.prepare_content(encodings, lazy)
+        self._pruned_lock = threading.Lock()
+        self._pruned_builds = OrderedDict()
+
+    def __getstate__(self):
+        # Pruned builds are only kept by the process they were made in, and
+        # the document is parsed from the content again if it is needed
+        state = dict(self.__dict__)
+        del state['_pruned_lock']
+        del state['_pruned_builds']
+        state['_document'] = None
+        return state
+
+    @property
+    def document(self):
+        if self._document is None:
+            self._document = json.loads(self.content[:].decode('utf-8'),
+                                        object_pairs_hook=OrderedDict)
+        return self._document
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._pruned_lock = threading.Lock()
+        self._pruned_builds = OrderedDict()
+
+    def prepare_content(self, encodings, lazy=False):
+        self.digest = hashlib.sha1(self.content).hexdigest()
+        self.etag = quote_etag(self.digest)
+
+        # Lazy encodings are None until they are served
+        self.encodings = {}
+        for encoding in encodings or []:
+            compress = COMPRESSORS.get(encoding)
+            if compress is not None:
+                self.encodings[encoding] = \
+                    None if lazy else compress(self.content[:])
+
+    def get_validator(self):
+        return SpecValidator(self.digest, list(self.encodings), self.created)
+
+    def get_content(self, encoding=None):
+        if encoding is None:
+            return self.content
+        content = self.encodings[encoding]
+        if content is None:
+            content = COMPRESSORS[encoding](self.content[:])
+            self.encodings[encoding] = content
+        return content
+
+    def get_path_definitions(self):
+        """
+        Returns the names of the definitions each path of the document
+        uses. Unless they were recorded when the document was generated, or
+        in the document by the `generate_swagger` command, these are the
+        definitions each path refers to, computed once per build.
+        """
+        path_definitions = getattr(self, '_path_definitions', None)
+        if path_definitions is None:
+            recorded = self.document.get(PATH_DEFINITIONS_EXTENSION)
+            if recorded is not None:
+                path_definitions = dict(
+                    (path, frozenset(names))
+                    for path, names in recorded.items())
+            else:
+                definitions = self.document.get('definitions') or {}
+                path_definitions = dict(
+                    (path, get_reachable_definitions(operations, definitions))
+                    for path, operations in self.document['paths'].items())
+            self._path_definitions = path_definitions
+        return path_definitions
+
+    def get_pruned_build(self, paths, renderer):
+        """
+        Returns a build of the document without paths, nor the definitions
+        only those use. Pruned builds are kept per set of paths, so that the
+        requests which are denied the same paths share their content and
+        encodings rather than render them again. See the
+        `cache_pruned_builds` setting.
+
+        Pruned builds are only compressed with the encodings they are
+        served with.
+        """
+        paths = frozenset(paths)
+        if not paths:
+            return self
+
+        with self._pruned_lock:
+            build = self._pruned_builds.pop(paths, None)
+            if build is not None:
+                # Most recently used last
+                self._pruned_builds[paths] = build
+                return build
+
+        path_definitions = self.get_path_definitions()
+        build = SpecBuild(
+            prune_document(self.document, paths, path_definitions),
+            renderer, list(self.encodings),
+            dict((path, names) for path, names in path_definitions.items()
+                 if path not in paths), lazy=True)
+        build.created = self.created
+
+        max_pruned_builds = rfs.SWAGGER_SETTINGS.get('cache_pruned_builds') or 0
+        with self._pruned_lock:
+            self._pruned_builds[paths] = build
+            while len(self._pruned_builds) > max_pruned_builds:
+                self._pruned_builds.popitem(last=False)
+        return build
+
+
+def get_file_id(stat):
+    """
+    Identifies a version of a file, which changes when the file is replaced
+    or written to
+    """
+    return (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime)
+
+
+class SpecFileBuild(SpecBuild):
+    """
+    A document written by the `generate_swagger` management command. The
+    file is memory mapped, and only parsed if the document is needed.
+
+    filename -- path to the JSON document
+    encodings -- content codings to compress the content with (optional)
+    """
+    def __init__(self, filename, encodings=None):
+        with open(filename, 'rb') as spec_file:
+            stat = os.fstat(spec_file.fileno())
+            if not stat.st_size:
+                raise ValueError('%s is empty' % filename)
+            self.content = mmap.mmap(spec_file.fileno(), 0,
+                                     access=mmap.ACCESS_READ)
+            self.created = stat.st_mtime
+            self.file_id = get_file_id(stat)
+        self._document = None
+        self.prepare_content(encodings)
+        self._pruned_lock = threading.Lock()
+        self._pruned_builds = OrderedDict()
+
+
+class SpecPartition(object):
+    """
+    The paths and definitions generated for the APIs of one partition,
+    which documents are assembled from.
+
+    namespace -- outermost URL namespace of the APIs, or ''
+    paths -- Swagger paths of the APIs
+    definitions -- Swagger definitions of the serializers they use
+    path_definitions -- names of the definitions each path uses
+    """
+    def __init__(self, namespace, paths, definitions, path_definitions):
+        self.namespace = namespace
+        self.paths = paths
+        self.definitions = definitions
+        self.path_definitions = path_definitions
+        self.created = time.time()
+
+    def get_age(self):
+        return max(0, int(time.time() - self.created))
+
+
+def is_expired(build, timeout):
+    """
+    Returns True when build is at least timeout seconds old. A timeout of
+    None never expires.
+    """
+    return timeout is not None and build.get_age() >= timeout
+
+
+def is_stale(build):
+    """
+    Stale documents are still served, while they are generated again in the
+    background. See the `cache_soft_timeout` setting.
+    """
+    return is_expired(build, rfs.SWAGGER_SETTINGS.get('cache_soft_timeout'))
+
+
+class SpecCache(object):
+    """
+    Process wide store of generated documents.
+
+    Builds which are in flight, such as the ones started at startup, are
+    registered with start_build so that requests can wait for them rather
+    than generate the same document.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._builds = {}
+        self._pending = {}
+        self._failures = {}
+
+    def get(self, key, wait=False, max_age=None, timeout=None):
+        """
+        Returns the build stored under key, unless it is max_age seconds old
+        or more. With wait, blocks until a build of key which is in flight
+        is done, or for timeout seconds at most.
+        """
+        with self._lock:
+            build = self._builds.get(key)
+            pending = self._pending.get(key)
+        if build is not None and is_expired(build, max_age):
+            build = None
+        if build is None and pending is not None and wait:
+            pending.wait(timeout)
+            build = self.get(key, max_age=max_age)
+        return build
+
+    def is_pending(self, key):
+        """
+        Returns True while a build of key is in flight
+        """
+        with self._lock:
+            return key in self._pending
+
+    def set(self, key, build):
+        with self._lock:
+            self._builds[key] = build
+
+    def start_build(self, key):
+        """
+        Registers a build of key as in flight. Returns False when another
+        one already is.
+        """
+        with self._lock:
+            if key in self._pending:
+                return False
+            self._pending[key] = threading.Event()
+            return True
+
+    def finish_build(self, key, build=None):
+        """
+        Stores the result of a build started with start_build, and wakes up
+        whoever waits for it. A failed build is finished without result, and
+        its time is recorded.
+        """
+        with self._lock:
+            if build is not None:
+                self._builds[key] = build
+                self._failures.pop(key, None)
+            else:
+                self._failures[key] = time.time()
+            pending = self._pending.pop(key, None)
+        if pending is not None:
+            pending.set()
+
+    def get_failure_age(self, key):
+        """
+        Returns the number of seconds since the last build of key failed, or
+        None when it did not
+        """
+        with self._lock:
+            failed = self._failures.get(key)
+        if failed is None:
+            return None
+        return max(0, time.time() - failed)
+
+    def invalidate_partition(self, namespace):
+        """
+        Drops the partition of namespace, along with the documents assembled
+        from it, while the other partitions stay cached. Returns the builds
+        of the documents dropped.
+        """
+        dropped = []
+        with self._lock:
+            for key, build in list(self._builds.items()):
+                if isinstance(build, SpecPartition):
+                    if build.namespace == namespace:
+                        del self._builds[key]
+                elif namespace in getattr(build, 'partitions', ()):
+                    del self._builds[key]
+                    dropped.append(build)
+        return dropped
+
+    def clear(self):
+        with self._lock:
+            self._builds.clear()
+            self._failures.clear()
+
+
+spec_cache = SpecCache()
+
+
+class SharedSpecCache(object):
+    """
+    Stores generated documents in the Django cache named by the
+    `cache_alias` setting, so that one build is reused by every process.
+    """
+    key_prefix = 'rest_framework_swagger.spec'
+
+    def get_backend(self):
+        alias = rfs.SWAGGER_SETTINGS.get('cache_alias')
+        if not alias:
+            return None
+        return get_cache(alias)
+
+    def get(self, key, max_age=None):
+        backend = self.get_backend()
+        if backend is None:
+            return None
+        build = backend.get(key)
+        if build is not None and is_expired(build, max_age):
+            return None
+        return build
+
+    def get_validator(self, key, max_age=None):
+        """
+        Returns the SpecValidator of a shared build, without fetching the
+        build
+        """
+        backend = self.get_backend()
+        if backend is None:
+            return None
+        validator = backend.get(key + ':etag')
+        if validator is not None and is_expired(validator, max_age):
+            return None
+        return validator
+
+    def get_etag(self, key, max_age=None):
+        """
+        Returns the ETag of a shared build, without fetching the build
+        """
+        validator = self.get_validator(key, max_age)
+        if validator is None:
+            return None
+        return validator.etag
+
+    def set(self, key, build):
+        """
+        Shares a SpecBuild, along with its validator, or a SpecPartition
+        """
+        backend = self.get_backend()
+        if backend is None:
+            return
+        kwargs = {}
+        timeout = rfs.SWAGGER_SETTINGS.get('cache_timeout')
+        if timeout is not None:
+            kwargs['timeout'] = timeout
+        values = {key: build}
+        if isinstance(build, SpecBuild):
+            values[key + ':etag'] = build.get_validator()
+        backend.set_many(values, **kwargs)
+
+    def delete(self, key):
+        backend = self.get_backend()
+        if backend is not None:
+            backend.delete_many([key, key + ':etag'])
+
+    def get_generation_key(self, namespace):
+        return '%s:generation:%s' % (self.key_prefix, namespace)
+
+    def get_generations(self, namespaces):
+        """
+        Returns the number of times each namespace was invalidated, for the
+        ones which were
+        """
+        backend = self.get_backend()
+        if backend is None:
+            return {}
+        keys = dict((self.get_generation_key(namespace), namespace)
+                    for namespace in namespaces)
+        return dict((keys[key], generation)
+                    for key, generation in backend.get_many(keys).items())
+
+    def increment_generation(self, namespace):
+        """
+        Makes every process generate the partition of namespace again,
+        rather than use the one shared so far
+        """
+        backend = self.get_backend()
+        if backend is None:
+            return
+        key = self.get_generation_key(namespace)
+        if not backend.add(key, 1, None):
+            backend.incr(key)
+
+    def acquire(self, key):
+        """
+        Takes the lease to generate the document of key, so that other
+        processes wait for it. Returns False when another process holds it.
+        """
+        backend = self.get_backend()
+        if backend is None:
+            return True
+        timeout = rfs.SWAGGER_SETTINGS.get('cache_lease_timeout')
+        return backend.add(key + ':lease', True, timeout)
+
+    def release(self, key):
+        backend = self.get_backend()
+        if backend is not None:
+            backend.delete(key + ':lease')
+
+    def wait(self, key, interval=0.05, max_interval=1, max_age=None):
+        """
+        Waits for the process holding the lease of key to store its build.
+        Returns None if the lease is released or expires without a build.
+        """
+        backend = self.get_backend()
+        if backend is None:
+            return None
+        while backend.get(key + ':lease') is not None:
+            time.sleep(interval)
+            interval = min(interval * 2, max_interval)
+            build = self.get(key, max_age)
+            if build is not None:
+                return build
+        return self.get(key, max_age)
+
+
+shared_spec_cache = SharedSpecCache()
+
+
+def invalidate_partition(namespace):
+    """
+    Makes the next request generate the paths and definitions of the URL
+    namespace again, for instance after its code changed, and reuse those of
+    the other namespaces. Use '' for the APIs outside of any namespace.
+
+    Documents assembled from the partition are dropped from this process,
+    and from the shared cache when they were stored there. The partition
+    itself is generated again by every process sharing the cache.
+    """
+    shared_spec_cache.increment_generation(namespace)
+    for build in spec_cache.invalidate_partition(namespace):
+        shared_key = getattr(build, 'shared_key', None)
+        if shared_key is not None:
+            shared_spec_cache.delete(shared_key)
+
+
+def get_spec_file(filter_path=None):
+    """
+    Returns the file a document was written to for filter_path, if any.
+
+    The `spec_file` setting is either a single path, or a dictionary mapping
+    filter paths to files.
+    """
+    spec_file = rfs.SWAGGER_SETTINGS.get('spec_file')
+    if isinstance(spec_file, dict):
+        return spec_file.get(filter_path or '')
+    return spec_file
+
+
+def load_spec_file(filename):
+    """
+    Returns the build of a document file, which is only read again once the
+    file is replaced, ie. by the `generate_swagger` command. Raises
+    ImproperlyConfigured when the file is missing or empty on first load.
+    """
+    key = ('spec_file', filename)
+    build = spec_cache.get(key)
+    if build is not None:
+        try:
+            if get_file_id(os.stat(filename)) != build.file_id:
+                build = None
+        except OSError:
+            # Keep serving the last version while the file is missing
+            pass
+    if build is None:
+        try:
+            build = SpecFileBuild(
+                filename, rfs.SWAGGER_SETTINGS.get('precompressed_encodings'))
+        except (IOError, OSError, ValueError) as e:
+            raise ImproperlyConfigured(
+                'The `spec_file` setting names "%s", which can not be '
+                'loaded: %s' % (filename, e))
+        spec_cache.set(key, build)
+    return build
+
+
+def is_cache_enabled():
+    """
+    Cached documents are generated without a user, and pruned per request
+    according to the `resource_access_handler` setting.
+    """
+    return bool(rfs.SWAGGER_SETTINGS.get('cache_enabled'))
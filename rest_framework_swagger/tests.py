@@ -1,4 +1,5 @@
 import datetime
+import json
 import platform
 import functools
 import os
@@ -22,6 +23,7 @@ from django.utils.decorators import classonlymethod
 from django.utils.importlib import import_module
 from django.views.generic import View
 import django_filters
+import yaml
 
 from rest_framework.views import APIView
 from rest_framework.generics import ListCreateAPIView
@@ -33,12 +35,19 @@ from rest_framework.settings import api_settings
 from rest_framework_swagger.compat import strip_tags
 import rest_framework
 
-from .decorators import wrapper_to_func, func_to_wrapper
-from .urlparser import UrlParser
-from .docgenerator import DocumentationGenerator_1_2
+from .decorators import wrapper_to_func, func_to_wrapper, parse_docstring
+from .urlparser import UrlParser, PathTrie, endpoint_registry, \
+    get_exclusion_matcher, get_named_groups, get_path_parameter
+from . import speccache
+from .speccache import spec_cache, get_cache_key, get_shared_cache_key, \
+    get_spec_file, SharedSpecCache
+from .views import get_content_encoding, get_offline_view, warm_up_cache
+from .docgenerator import prune_document, PATH_DEFINITIONS_EXTENSION, \
+    DocumentationGenerator as DocumentationGenerator_1_2
 from .introspectors import ViewSetIntrospector, APIViewIntrospector, \
     WrappedAPIViewMethodIntrospector, IntrospectorHelper, \
-    APIViewMethodIntrospector, get_data_type
+    APIViewMethodIntrospector, get_data_type, YAMLCache, yaml_cache, \
+    serializer_cache
 from . import DEFAULT_SWAGGER_SETTINGS
 
 
@@ -129,6 +138,8 @@ base_path_SETTINGS = {
     }
 }
 
+CACHED_SWAGGER_SETTINGS = dict(DEFAULT_SWAGGER_SETTINGS, cache_enabled=True)
+
 
 class DocumentationGeneratorMixin(object):
     documentation_generators = {}
@@ -144,6 +155,31 @@ class DocumentationGeneratorMixin(object):
         return self.documentation_generators['1.2'][for_user]
 
 
+class SpecCacheMixin(object):
+    """
+    Mixes into TestCase subclasses to serve the documentation of
+    get_view_patterns under docs_prefix, with an empty spec_cache.
+    """
+    docs_prefix = r'^'
+
+    def get_view_patterns(self):
+        return [
+            url(r'^a-view/?$', MockApiView.as_view(), name='a test view'),
+        ]
+
+    def setUp(self):
+        url_patterns = self.get_view_patterns() + [
+            url(self.docs_prefix, include('rest_framework_swagger.urls')),
+        ]
+        self.url_patterns = patterns('', *url_patterns)
+        urls = import_module(settings.ROOT_URLCONF)
+        urls.urlpatterns = self.url_patterns
+        spec_cache.clear()
+
+    def tearDown(self):
+        spec_cache.clear()
+
+
 @override_settings(**base_path_SETTINGS)
 class OverrideBasePathTest(TestCase):
     def setUp(self):
@@ -164,6 +200,1204 @@ class OverrideBasePathTest(TestCase):
         self.assertEqual('tacotown.com', base_url.netloc)
 
 
+@override_settings(SWAGGER_SETTINGS=CACHED_SWAGGER_SETTINGS)
+class SpecCacheTest(SpecCacheMixin, TestCase):
+    docs_prefix = r'^swagger/'
+
+    def test_document_is_generated_once(self):
+        with patch.object(DocumentationGenerator_1_2, 'generate',
+                          return_value={}) as generate:
+            first = self.client.get("/swagger/api-docs")
+            second = self.client.get("/swagger/api-docs")
+
+        self.assertEqual(1, generate.call_count)
+        self.assertEqual(parse_json(first), parse_json(second))
+
+    def test_cache_disabled(self):
+        with self.settings(SWAGGER_SETTINGS=dict(
+                CACHED_SWAGGER_SETTINGS, cache_enabled=False)):
+            with patch.object(DocumentationGenerator_1_2, 'generate',
+                              return_value={}) as generate:
+                self.client.get("/swagger/api-docs")
+                self.client.get("/swagger/api-docs")
+
+        self.assertEqual(2, generate.call_count)
+
+    def test_cache_disabled_by_default(self):
+        with self.settings(SWAGGER_SETTINGS=dict(DEFAULT_SWAGGER_SETTINGS)):
+            with patch.object(DocumentationGenerator_1_2, '__init__',
+                              return_value=None) as init:
+                with patch.object(DocumentationGenerator_1_2, 'generate',
+                                  return_value={}):
+                    with patch.object(DocumentationGenerator_1_2,
+                                      'get_models', return_value={}):
+                        self.client.get("/swagger/api-docs")
+
+        # Introspected as the requesting user
+        self.assertEqual(1, init.call_count)
+        self.assertIsNotNone(init.call_args[1]['for_user'])
+
+    def test_resource_access_handler_shares_cache(self):
+        with self.settings(SWAGGER_SETTINGS=dict(
+                CACHED_SWAGGER_SETTINGS,
+                resource_access_handler=lambda request, resource: True)):
+            with patch.object(DocumentationGenerator_1_2, 'generate',
+                              return_value={}) as generate:
+                self.client.get("/swagger/api-docs")
+                self.client.get("/swagger/api-docs")
+
+        self.assertEqual(1, generate.call_count)
+
+    def test_settings_change_invalidates_cache(self):
+        self.client.get("/swagger/api-docs")
+        self.assertNotEqual({}, spec_cache._builds)
+
+        with self.settings(SWAGGER_SETTINGS=dict(
+                CACHED_SWAGGER_SETTINGS, api_version='2')):
+            self.assertEqual({}, spec_cache._builds)
+
+    def test_cache_key(self):
+        key = get_cache_key('app.urls', '/v1')
+        self.assertEqual(('app.urls', '/v1'), key[:2])
+        self.assertEqual(key, get_cache_key('app.urls', '/v1'))
+        self.assertNotEqual(key, get_cache_key('app.urls', '/v2'))
+        self.assertNotEqual(key, get_cache_key('other.urls', '/v1'))
+        self.assertEqual(settings.ROOT_URLCONF, get_cache_key()[0])
+
+
+@override_settings(SWAGGER_SETTINGS=CACHED_SWAGGER_SETTINGS)
+class SharedSpecCacheTest(SpecCacheMixin, TestCase):
+    docs_prefix = r'^swagger/'
+
+    def assert_document_is_shared(self, caches):
+        swagger_settings = dict(CACHED_SWAGGER_SETTINGS, cache_alias='specs')
+        with self.settings(CACHES=caches, SWAGGER_SETTINGS=swagger_settings):
+            with patch.object(DocumentationGenerator_1_2, 'generate',
+                              return_value={}) as generate:
+                first = self.client.get("/swagger/api-docs")
+                # Simulates another process, with a cold in-process cache
+                spec_cache.clear()
+                second = self.client.get("/swagger/api-docs")
+
+        self.assertEqual(1, generate.call_count)
+        self.assertEqual(parse_json(first), parse_json(second))
+
+    def test_locmem_backend(self):
+        self.assert_document_is_shared({
+            'default': settings.CACHES['default'],
+            'specs': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': 'rest-framework-swagger-tests',
+            },
+        })
+
+    def test_file_based_backend(self):
+        import shutil
+        import tempfile
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        self.assert_document_is_shared({
+            'default': settings.CACHES['default'],
+            'specs': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': location,
+            },
+        })
+
+    def test_shared_cache_key(self):
+        urlparser = UrlParser()
+        apis = urlparser.get_apis(self.url_patterns)
+        key = get_shared_cache_key(apis)
+
+        self.assertEqual(key, get_shared_cache_key(urlparser.get_apis(
+            self.url_patterns)))
+        self.assertNotEqual(key, get_shared_cache_key(apis, '/v1'))
+        self.assertNotEqual(key, get_shared_cache_key([]))
+        with patch('rest_framework_swagger.VERSION', '0.0.0'):
+            self.assertNotEqual(key, get_shared_cache_key(apis))
+
+    def test_settings_fingerprint_is_stable(self):
+        import warnings
+        from django.utils.translation import ugettext_lazy
+        from .speccache import get_settings_fingerprint
+
+        class Handler(object):
+            def __call__(self, request, resource):
+                return True
+
+        def get_fingerprint(**values):
+            with self.settings(SWAGGER_SETTINGS=dict(
+                    CACHED_SWAGGER_SETTINGS, **values)):
+                return get_settings_fingerprint()
+
+        self.assertEqual(
+            get_fingerprint(info={'title': ugettext_lazy('API')}),
+            get_fingerprint(info={'title': 'API'}))
+        self.assertEqual(
+            get_fingerprint(resource_access_handler=functools.partial(
+                parse_json, 1)),
+            get_fingerprint(resource_access_handler=functools.partial(
+                parse_json, 1)))
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            self.assertEqual(
+                get_fingerprint(resource_access_handler=Handler()),
+                get_fingerprint(resource_access_handler=Handler()))
+        self.assertEqual(RuntimeWarning, caught[0].category)
+
+    def test_document_is_not_pickled(self):
+        import pickle
+        build = speccache.SpecBuild({'paths': {'/a/': {}}}, Mock(
+            render=Mock(return_value=b'{"paths": {"/a/": {}}}')))
+        state = build.__getstate__()
+
+        self.assertIsNone(state['_document'])
+        self.assertEqual({'paths': {'/a/': {}}},
+                         pickle.loads(pickle.dumps(build)).document)
+
+
+@override_settings(SWAGGER_SETTINGS=CACHED_SWAGGER_SETTINGS)
+class ConditionalGetTest(SpecCacheMixin, TestCase):
+    docs_prefix = r'^swagger/'
+
+    def test_etag(self):
+        response = self.client.get("/swagger/api-docs")
+        etag = response['ETag']
+
+        self.assertTrue(etag.startswith('"'))
+        self.assertEqual(etag, self.client.get("/swagger/api-docs")['ETag'])
+
+    def test_not_modified(self):
+        etag = self.client.get("/swagger/api-docs")['ETag']
+
+        with patch.object(DocumentationGenerator_1_2, 'generate') as generate:
+            response = self.client.get("/swagger/api-docs",
+                                       HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(304, response.status_code)
+        self.assertEqual(b'', response.content)
+        self.assertEqual(etag, response['ETag'])
+        self.assertFalse(generate.called)
+
+    def test_modified(self):
+        response = self.client.get("/swagger/api-docs",
+                                   HTTP_IF_NONE_MATCH='"stale", W/"older"')
+
+        self.assertEqual(200, response.status_code)
+        self.assertIn('paths', parse_json(response))
+
+    def test_not_modified_without_cache(self):
+        with self.settings(SWAGGER_SETTINGS=dict(
+                CACHED_SWAGGER_SETTINGS, cache_enabled=False)):
+            etag = self.client.get("/swagger/api-docs")['ETag']
+            response = self.client.get("/swagger/api-docs",
+                                       HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(304, response.status_code)
+
+    def test_not_modified_validates_shared_etag(self):
+        swagger_settings = dict(CACHED_SWAGGER_SETTINGS, cache_alias='specs')
+        caches = {
+            'default': settings.CACHES['default'],
+            'specs': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': 'rest-framework-swagger-etag-tests',
+            },
+        }
+        with self.settings(CACHES=caches, SWAGGER_SETTINGS=swagger_settings):
+            etag = self.client.get("/swagger/api-docs")['ETag']
+            spec_cache.clear()
+            with patch.object(SharedSpecCache, 'get') as get:
+                response = self.client.get("/swagger/api-docs",
+                                           HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(304, response.status_code)
+        self.assertFalse(get.called)
+
+    def test_shared_not_modified_headers(self):
+        swagger_settings = dict(CACHED_SWAGGER_SETTINGS, cache_alias='specs',
+                                precompressed_encodings=['gzip'])
+        caches = {
+            'default': settings.CACHES['default'],
+            'specs': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': 'rest-framework-swagger-etag-tests',
+            },
+        }
+        with self.settings(CACHES=caches, SWAGGER_SETTINGS=swagger_settings):
+            expected = self.client.get("/swagger/api-docs",
+                                       HTTP_ACCEPT_ENCODING='gzip')
+            spec_cache.clear()
+            with patch.object(SharedSpecCache, 'get') as get:
+                response = self.client.get(
+                    "/swagger/api-docs", HTTP_ACCEPT_ENCODING='gzip',
+                    HTTP_IF_NONE_MATCH=expected['ETag'])
+
+        self.assertFalse(get.called)
+        self.assertEqual(304, response.status_code)
+        self.assertEqual('gzip', expected['Content-Encoding'])
+        self.assertEqual(expected['ETag'], response['ETag'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertIn('Age', response)
+
+
+@override_settings(SWAGGER_SETTINGS=CACHED_SWAGGER_SETTINGS)
+class PrerenderedResponseTest(SpecCacheMixin, TestCase):
+    docs_prefix = r'^swagger/'
+
+    def test_content_is_rendered_once(self):
+        from rest_framework_swagger.views import JSONRenderer
+        first = self.client.get("/swagger/api-docs")
+
+        with patch.object(JSONRenderer, 'render') as render:
+            second = self.client.get("/swagger/api-docs")
+
+        self.assertFalse(render.called)
+        self.assertEqual(first.content, second.content)
+        self.assertEqual('application/json', second['Content-Type'])
+        self.assertIn('paths', parse_json(second))
+
+    def test_content_negotiation(self):
+        response = self.client.get("/swagger/api-docs",
+                                   HTTP_ACCEPT='text/html')
+
+        self.assertEqual(406, response.status_code)
+
+    def test_indented_content(self):
+        compact = self.client.get("/swagger/api-docs")
+        indented = self.client.get("/swagger/api-docs",
+                                   HTTP_ACCEPT='application/json; indent=4')
+
+        self.assertNotEqual(compact.content, indented.content)
+        self.assertEqual(parse_json(compact), parse_json(indented))
+        self.assertEqual('W/' + compact['ETag'], indented['ETag'])
+
+        not_modified = self.client.get(
+            "/swagger/api-docs", HTTP_ACCEPT='application/json; indent=4',
+            HTTP_IF_NONE_MATCH=indented['ETag'])
+        self.assertEqual(304, not_modified.status_code)
+        self.assertEqual(indented['ETag'], not_modified['ETag'])
+
+    def test_prerender_disabled(self):
+        with self.settings(SWAGGER_SETTINGS=dict(
+                CACHED_SWAGGER_SETTINGS, prerender_response=False)):
+            response = self.client.get("/swagger/api-docs")
+
+        self.assertTrue(hasattr(response, 'data'))
+        self.assertIn('paths', parse_json(response))
+
+
+@override_settings(SWAGGER_SETTINGS=CACHED_SWAGGER_SETTINGS)
+class PrecompressedResponseTest(SpecCacheMixin, TestCase):
+    docs_prefix = r'^swagger/'
+
+    def test_gzip(self):
+        import gzip
+        from io import BytesIO
+        identity = self.client.get("/swagger/api-docs")
+        compressed = self.client.get("/swagger/api-docs",
+                                     HTTP_ACCEPT_ENCODING='gzip, deflate')
+
+        self.assertEqual('gzip', compressed['Content-Encoding'])
+        self.assertFalse(identity.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', compressed['Vary'])
+        self.assertIn('Accept-Encoding', identity['Vary'])
+        self.assertNotEqual(identity['ETag'], compressed['ETag'])
+        content = gzip.GzipFile(fileobj=BytesIO(compressed.content)).read()
+        self.assertEqual(identity.content, content)
+
+    def test_encoding_is_compressed_once(self):
+        self.client.get("/swagger/api-docs")
+
+        compress = Mock()
+        with patch.dict(speccache.COMPRESSORS, gzip=compress):
+            self.client.get("/swagger/api-docs", HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertFalse(compress.called)
+
+    def test_refused_encoding(self):
+        response = self.client.get("/swagger/api-docs",
+                                   HTTP_ACCEPT_ENCODING='gzip;q=0, br;q=0')
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_preferred_encoding(self):
+        request = Mock(META={'HTTP_ACCEPT_ENCODING': 'gzip;q=0.5, br'})
+        encodings = {'gzip': b'', 'br': b''}
+        self.assertEqual('br', get_content_encoding(request, encodings))
+
+        request.META['HTTP_ACCEPT_ENCODING'] = '*'
+        self.assertEqual('br', get_content_encoding(request, encodings))
+        self.assertEqual('gzip', get_content_encoding(
+            request, {'gzip': b''}))
+
+        request.META['HTTP_ACCEPT_ENCODING'] = 'identity'
+        self.assertIsNone(get_content_encoding(request, encodings))
+
+    def test_not_modified_encoding(self):
+        etag = self.client.get("/swagger/api-docs",
+                               HTTP_ACCEPT_ENCODING='gzip')['ETag']
+        response = self.client.get("/swagger/api-docs",
+                                   HTTP_ACCEPT_ENCODING='gzip',
+                                   HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(304, response.status_code)
+        self.assertEqual(etag, response['ETag'])
+
+    def test_no_encodings(self):
+        with self.settings(SWAGGER_SETTINGS=dict(
+                CACHED_SWAGGER_SETTINGS, precompressed_encodings=[])):
+            response = self.client.get("/swagger/api-docs",
+                                       HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+
+@override_settings(SWAGGER_SETTINGS=CACHED_SWAGGER_SETTINGS)
+class SpecFileTest(SpecCacheMixin, TestCase):
+    def setUp(self):
+        import shutil
+        import tempfile
+        super(SpecFileTest, self).setUp()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.spec_file = os.path.join(directory, 'swagger.json')
+
+    def test_generate_swagger(self):
+        from django.core.management import call_command
+        call_command('generate_swagger', output=self.spec_file)
+
+        with open(self.spec_file, 'rb') as spec_file:
+            document = json.loads(spec_file.read().decode('utf-8'))
+        self.assertEqual({'/a-view/': []},
+                         document.pop(PATH_DEFINITIONS_EXTENSION))
+        self.assertEqual(parse_json(self.client.get("/api-docs")), document)
+        self.assertIn('/a-view/', parse_json(self.client.get("/api-docs"))['paths'])
+
+    def test_generate_swagger_unknown_user(self):
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+        with self.assertRaises(CommandError):
+            call_command('generate_swagger', output=self.spec_file,
+                         username='nobody')
+
+    def test_serve_spec_file(self):
+        from django.core.management import call_command
+        call_command('generate_swagger', output=self.spec_file)
+        with open(self.spec_file, 'rb') as spec_file:
+            expected = spec_file.read()
+
+        with self.settings(SWAGGER_SETTINGS=dict(
+                CACHED_SWAGGER_SETTINGS, spec_file=self.spec_file)):
+            with patch.object(DocumentationGenerator_1_2,
+                              'generate') as generate:
+                response = self.client.get("/api-docs")
+                content = b''.join(response.streaming_content)
+                indented = self.client.get(
+                    "/api-docs", HTTP_ACCEPT='application/json; indent=4')
+
+        self.assertFalse(generate.called)
+        self.assertEqual(expected, content)
+        self.assertIn('ETag', response)
+        self.assertEqual(json.loads(expected.decode('utf-8')),
+                         parse_json(indented))
+
+    def test_spec_file_is_reloaded_when_replaced(self):
+        from django.core.management import call_command
+        call_command('generate_swagger', output=self.spec_file)
+
+        first = speccache.load_spec_file(self.spec_file)
+        self.assertIs(first, speccache.load_spec_file(self.spec_file))
+
+        urls = import_module(settings.ROOT_URLCONF)
+        urls.urlpatterns = patterns(
+            '',
+            url(r'^other-view/?$', MockApiView.as_view()),
+            url(r'^', include('rest_framework_swagger.urls')),
+        )
+        call_command('generate_swagger', output=self.spec_file)
+        second = speccache.load_spec_file(self.spec_file)
+
+        self.assertEqual(['/a-view/'], list(first.document['paths']))
+        self.assertEqual(['/other-view/'], list(second.document['paths']))
+        self.assertIs(second, speccache.load_spec_file(self.spec_file))
+
+    def test_spec_file_resource_access(self):
+        from django.core.management import call_command
+        urls = import_module(settings.ROOT_URLCONF)
+        urls.urlpatterns = patterns(
+            '',
+            url(r'^secret/?$', SecretView.as_view(), name='secret'),
+            url(r'^public/?$', PublicView.as_view(), name='public'),
+            url(r'^', include('rest_framework_swagger.urls')),
+        )
+        call_command('generate_swagger', output=self.spec_file)
+
+        with self.settings(SWAGGER_SETTINGS=dict(
+                CACHED_SWAGGER_SETTINGS, spec_file=self.spec_file,
+                resource_access_handler='app.handler')), \
+                patch('rest_framework_swagger.views.SwaggerApiView'
+                      '.handle_resource_access',
+                      lambda view, request, resource:
+                      resource.name == 'public'):
+            document = parse_json(self.client.get("/api-docs"))
+
+        self.assertEqual(['/public/'], list(document['paths']))
+        self.assertEqual(['PublicSerializer'], list(document['definitions']))
+
+    def test_spec_file_missing_or_empty(self):
+        from django.core.exceptions import ImproperlyConfigured
+        with self.assertRaises(ImproperlyConfigured) as missing:
+            speccache.load_spec_file(self.spec_file)
+        self.assertIn(self.spec_file, str(missing.exception))
+
+        open(self.spec_file, 'wb').close()
+        with self.assertRaises(ImproperlyConfigured) as empty:
+            speccache.load_spec_file(self.spec_file)
+        self.assertIn('empty', str(empty.exception))
+
+    def test_spec_file_per_path(self):
+        with open(self.spec_file, 'wb') as spec_file:
+            spec_file.write(b'{"swagger": "2.0", "basePath": "/v1"}')
+
+        with self.settings(SWAGGER_SETTINGS=dict(
+                CACHED_SWAGGER_SETTINGS, spec_file={'/v1': self.spec_file})):
+            self.assertEqual(self.spec_file, get_spec_file('/v1'))
+            self.assertIsNone(get_spec_file(''))
+
+
+@override_settings(SWAGGER_SETTINGS=CACHED_SWAGGER_SETTINGS)
+class WarmUpCacheTest(SpecCacheMixin, TestCase):
+    def test_warm_up_cache(self):
+        warm_up_cache(['']).join()
+
+        with patch.object(DocumentationGenerator_1_2,
+                          'generate') as generate:
+            response = self.client.get("/api-docs")
+
+        self.assertFalse(generate.called)
+        self.assertIn('/a-view/', parse_json(response)['paths'])
+
+    def test_failed_warm_up(self):
+        with patch.object(DocumentationGenerator_1_2, 'generate',
+                          side_effect=ValueError):
+            warm_up_cache(['']).join()
+
+        self.assertIsNone(spec_cache.get(get_cache_key(None, ''), wait=True))
+        response = self.client.get("/api-docs")
+        self.assertIn('/a-view/', parse_json(response)['paths'])
+
+    def test_wait_for_build_in_flight(self):
+        import threading
+        key = get_cache_key(None, '')
+        self.assertTrue(spec_cache.start_build(key))
+        self.assertFalse(spec_cache.start_build(key))
+        build = Mock()
+
+        timer = threading.Timer(0.05, spec_cache.finish_build,
+                                args=(key, build))
+        timer.start()
+        self.assertIsNone(spec_cache.get(key))
+        self.assertEqual(build, spec_cache.get(key, wait=True))
+        timer.join()
+
+    def test_ready(self):
+        import django
+        if django.VERSION < (1, 7):
+            raise SkipTest('Only for Django>=1.7')
+        from django.apps import apps
+        config = apps.get_app_config('rest_framework_swagger')
+        with patch('rest_framework_swagger.views.warm_up_cache') as warm_up:
+            config.ready()
+            self.assertFalse(warm_up.called)
+
+            with self.settings(SWAGGER_SETTINGS=dict(
+                    CACHED_SWAGGER_SETTINGS, cache_warm_up_paths=['/v1'])):
+                config.ready()
+                with patch('sys.argv', ['manage.py', 'migrate']):
+                    config.ready()
+                with patch('sys.argv', ['manage.py', 'runserver']):
+                    config.ready()
+            self.assertEqual(2, warm_up.call_count)
+            warm_up.assert_called_with(['/v1'])
+
+
+@override_settings(SWAGGER_SETTINGS=CACHED_SWAGGER_SETTINGS)
+class SingleFlightTest(SpecCacheMixin, TestCase):
+    caches = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        'specs': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'rest-framework-swagger-lease-tests',
+        },
+    }
+
+    def slow_generate(self, apis):
+        import time
+        time.sleep(0.1)
+        return {}
+
+    def test_concurrent_requests(self):
+        import threading
+        responses = []
+
+        def get():
+            responses.append(self.client.get("/api-docs"))
+
+        with patch.object(DocumentationGenerator_1_2, 'generate',
+                          side_effect=self.slow_generate) as generate:
+            threads = [threading.Thread(target=get) for i in range(5)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(1, generate.call_count)
+        self.assertEqual(5, len(responses))
+        self.assertEqual(1, len(set(r.content for r in responses)))
+
+    def test_stalled_build(self):
+        with self.settings(SWAGGER_SETTINGS=dict(
+                CACHED_SWAGGER_SETTINGS, cache_lease_timeout=0.1)):
+            # ie. a warm up blocked on the database
+            key = get_cache_key(None, '')
+            self.assertTrue(spec_cache.start_build(key))
+            try:
+                with patch.object(DocumentationGenerator_1_2, 'generate',
+                                  return_value={}) as generate:
+                    response = self.client.get("/api-docs")
+                    self.client.get("/api-docs")
+                self.assertTrue(spec_cache.is_pending(key))
+            finally:
+                spec_cache.finish_build(key)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(1, generate.call_count)
+
+    def get_shared_build(self):
+        view = get_offline_view('')
+        apis = view.get_apis('')
+        shared_key = get_shared_cache_key(apis, '')
+        return view, apis, shared_key
+
+    def test_wait_for_lease(self):
+        import threading
+        from rest_framework_swagger.views import JSONRenderer
+        swagger_settings = dict(CACHED_SWAGGER_SETTINGS, cache_alias='specs')
+        with self.settings(CACHES=self.caches,
+                           SWAGGER_SETTINGS=swagger_settings):
+            view, apis, shared_key = self.get_shared_build()
+            shared_spec_cache = SharedSpecCache()
+            shared_spec_cache.get_backend().clear()
+            self.assertTrue(shared_spec_cache.acquire(shared_key))
+            self.assertFalse(shared_spec_cache.acquire(shared_key))
+
+            stored = speccache.SpecBuild({'paths': {}}, JSONRenderer())
+
+            def finish():
+                shared_spec_cache.set(shared_key, stored)
+                shared_spec_cache.release(shared_key)
+
+            timer = threading.Timer(0.1, finish)
+            timer.start()
+            with patch.object(DocumentationGenerator_1_2,
+                              'generate') as generate:
+                build = view.get_shared_build('', apis, shared_key)
+            timer.join()
+
+        self.assertFalse(generate.called)
+        self.assertEqual(stored.etag, build.etag)
+        self.assertEqual(stored.document, build.document)
+
+    def test_lease_released_without_build(self):
+        import threading
+        swagger_settings = dict(CACHED_SWAGGER_SETTINGS, cache_alias='specs')
+        with self.settings(CACHES=self.caches,
+                           SWAGGER_SETTINGS=swagger_settings):
+            view, apis, shared_key = self.get_shared_build()
+            shared_spec_cache = SharedSpecCache()
+            shared_spec_cache.get_backend().clear()
+            shared_spec_cache.acquire(shared_key)
+
+            timer = threading.Timer(0.1, shared_spec_cache.release,
+                                    args=(shared_key,))
+            timer.start()
+            with patch.object(DocumentationGenerator_1_2, 'generate',
+                              return_value={}) as generate:
+                build = view.get_shared_build('', apis, shared_key)
+            timer.join()
+
+            self.assertEqual(1, generate.call_count)
+            self.assertEqual({}, build.document['paths'])
+            self.assertTrue(shared_spec_cache.acquire(shared_key))
+
+
+@override_settings(SWAGGER_SETTINGS=CACHED_SWAGGER_SETTINGS)
+class StaleWhileRevalidateTest(SpecCacheMixin, TestCase):
+    def swagger_settings(self, **kwargs):
+        return self.settings(SWAGGER_SETTINGS=dict(
+            CACHED_SWAGGER_SETTINGS, **kwargs))
+
+    def age_build(self, seconds):
+        # The partitions the document was assembled from age along with it
+        for build in spec_cache._builds.values():
+            build.created -= seconds
+        return spec_cache.get(get_cache_key(None, ''))
+
+    def join_revalidation(self):
+        import threading
+        for thread in threading.enumerate():
+            if thread.name == 'rest_framework_swagger.revalidate_cache':
+                thread.join()
+
+    def test_age_header(self):
+        response = self.client.get("/api-docs")
+        self.assertEqual('0', response['Age'])
+
+        self.age_build(30)
+        response = self.client.get("/api-docs")
+        self.assertEqual('30', response['Age'])
+
+    def test_serve_stale_while_revalidating(self):
+        with self.swagger_settings(cache_soft_timeout=10,
+                                   cache_hard_timeout=60):
+            self.client.get("/api-docs")
+            stale = self.age_build(20)
+
+            with patch.object(DocumentationGenerator_1_2, 'generate',
+                              return_value={}) as generate:
+                response = self.client.get("/api-docs")
+                self.join_revalidation()
+
+            self.assertEqual('20', response['Age'])
+            self.assertEqual(stale.content, response.content)
+            self.assertEqual(1, generate.call_count)
+
+            response = self.client.get("/api-docs")
+            self.assertEqual('0', response['Age'])
+            self.assertEqual({}, parse_json(response)['paths'])
+
+    def test_failed_revalidation(self):
+        with self.swagger_settings(cache_soft_timeout=10):
+            self.client.get("/api-docs")
+            stale = self.age_build(20)
+
+            with patch.object(DocumentationGenerator_1_2, 'generate',
+                              side_effect=ValueError):
+                self.client.get("/api-docs")
+                self.join_revalidation()
+
+            self.assertEqual(stale, spec_cache.get(get_cache_key(None, '')))
+
+    def test_failed_revalidation_backs_off(self):
+        with self.swagger_settings(cache_soft_timeout=10):
+            self.client.get("/api-docs")
+            self.age_build(20)
+            key = get_cache_key(None, '')
+
+            with patch.object(DocumentationGenerator_1_2, 'generate',
+                              side_effect=ValueError) as generate:
+                self.client.get("/api-docs")
+                self.join_revalidation()
+                self.client.get("/api-docs")
+                self.join_revalidation()
+                self.assertEqual(1, generate.call_count)
+
+                spec_cache._failures[key] -= 10
+                self.client.get("/api-docs")
+                self.join_revalidation()
+                self.assertEqual(2, generate.call_count)
+
+    def test_hard_timeout(self):
+        with self.swagger_settings(cache_soft_timeout=10,
+                                   cache_hard_timeout=60):
+            self.client.get("/api-docs")
+            self.age_build(90)
+
+            with patch.object(DocumentationGenerator_1_2, 'generate',
+                              return_value={}) as generate:
+                response = self.client.get("/api-docs")
+
+            self.assertEqual(1, generate.call_count)
+            self.assertEqual('0', response['Age'])
+            self.assertEqual({}, parse_json(response)['paths'])
+
+    def test_stale_shared_build(self):
+        caches = {
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            },
+        }
+        with self.settings(CACHES=caches), \
+                self.swagger_settings(cache_alias='default',
+                                      cache_hard_timeout=60):
+            view = get_offline_view('')
+            apis = view.get_apis('')
+            shared_key = get_shared_cache_key(apis, '')
+            build = view.get_shared_build('', apis, shared_key)
+            shared_spec_cache = SharedSpecCache()
+            self.assertEqual(build.etag,
+                             shared_spec_cache.get_etag(shared_key, 60))
+
+            build.created -= 90
+            shared_spec_cache.set(shared_key, build)
+            self.assertIsNone(shared_spec_cache.get(shared_key, 60))
+            self.assertIsNone(shared_spec_cache.get_etag(shared_key, 60))
+            self.assertEqual(build.etag,
+                             shared_spec_cache.get_etag(shared_key))
+
+
+@override_settings(SWAGGER_SETTINGS=CACHED_SWAGGER_SETTINGS)
+class ResourceAccessTest(SpecCacheMixin, TestCase):
+    def get_view_patterns(self):
+        return [
+            url(r'^a-view/?$', MockApiView.as_view(), name='a test view'),
+            url(r'^other-view/?$', MockApiView.as_view(), name='other view'),
+        ]
+
+    def get_document(self):
+        return {
+            'paths': {
+                '/a/': {'get': {'responses': {'200': {
+                    'schema': {'$ref': '#/definitions/A'}}}}},
+                '/b/': {'post': {'parameters': [{
+                    'in': 'body', 'schema': {'$ref': '#/definitions/B'}}]}},
+            },
+            'definitions': {
+                'A': {'properties': {
+                    'shared': {'$ref': '#/definitions/Shared'},
+                    'nested': {'items': {'$ref': '#/definitions/Nested'}},
+                }},
+                'B': {'properties': {
+                    'shared': {'$ref': '#/definitions/Shared'}}},
+                'Nested': {'properties': {}},
+                'Shared': {'properties': {}},
+                'Unused': {'properties': {}},
+            },
+            'info': {},
+        }
+
+    def test_prune_document(self):
+        document = self.get_document()
+        pruned = prune_document(document, set(['/a/']))
+
+        self.assertEqual(['/b/'], list(pruned['paths']))
+        self.assertEqual(['B', 'Shared', 'Unused'],
+                         sorted(pruned['definitions']))
+        self.assertEqual(self.get_document(), document)
+
+    def test_prune_nothing(self):
+        document = self.get_document()
+        self.assertEqual(document, prune_document(document, set()))
+
+    def get_response(self, allowed):
+        with patch('rest_framework_swagger.views.SwaggerApiView'
+                   '.handle_resource_access',
+                   lambda view, request, resource: resource.name in allowed):
+            return self.client.get("/api-docs")
+
+    def test_paths_are_pruned_per_request(self):
+        swagger_settings = dict(CACHED_SWAGGER_SETTINGS,
+                                resource_access_handler='app.handler')
+        with self.settings(SWAGGER_SETTINGS=swagger_settings), \
+                patch.object(DocumentationGenerator_1_2, 'generate',
+                             wraps=DocumentationGenerator_1_2().generate) \
+                as generate:
+            both = self.get_response(['a test view', 'other view'])
+            one = self.get_response(['other view'])
+            none = self.get_response([])
+
+        self.assertEqual(1, generate.call_count)
+        self.assertEqual(['/a-view/', '/other-view/'],
+                         sorted(parse_json(both)['paths']))
+        self.assertEqual(['/other-view/'], list(parse_json(one)['paths']))
+        self.assertEqual({}, parse_json(none)['paths'])
+        self.assertNotEqual(both['ETag'], one['ETag'])
+
+    def test_definitions_of_denied_serializers_are_pruned(self):
+        urls = import_module(settings.ROOT_URLCONF)
+        urls.urlpatterns = patterns(
+            '',
+            url(r'^secret/?$', SecretView.as_view(), name='secret'),
+            url(r'^public/?$', PublicView.as_view(), name='public'),
+            url(r'^', include('rest_framework_swagger.urls')),
+        )
+        swagger_settings = dict(CACHED_SWAGGER_SETTINGS,
+                                resource_access_handler='app.handler')
+        with self.settings(SWAGGER_SETTINGS=swagger_settings):
+            both = parse_json(self.get_response(['secret', 'public']))
+            public = parse_json(self.get_response(['public']))
+
+        self.assertEqual(
+            ['PublicSerializer', 'SecretDetailSerializer', 'SecretSerializer'],
+            sorted(both['definitions']))
+        self.assertEqual(['/public/'], list(public['paths']))
+        self.assertEqual(['PublicSerializer'], list(public['definitions']))
+
+    def test_pruned_builds_are_reused(self):
+        from rest_framework_swagger.views import JSONRenderer
+        build = speccache.SpecBuild(self.get_document(), JSONRenderer(),
+                                    ['gzip'])
+        pruned = build.get_pruned_build(['/a/'], JSONRenderer())
+
+        with patch.object(JSONRenderer, 'render') as render:
+            self.assertIs(pruned, build.get_pruned_build(set(['/a/']),
+                                                         JSONRenderer()))
+            self.assertIs(build, build.get_pruned_build([], JSONRenderer()))
+        self.assertFalse(render.called)
+        self.assertEqual(['/b/'], list(pruned.document['paths']))
+        self.assertEqual(['gzip'], list(pruned.encodings))
+        self.assertIsNot(pruned, build.get_pruned_build(['/b/'],
+                                                        JSONRenderer()))
+
+    def test_pruned_builds_are_compressed_lazily(self):
+        from rest_framework_swagger.views import JSONRenderer
+        build = speccache.SpecBuild(self.get_document(), JSONRenderer(),
+                                    ['gzip'])
+        compress = Mock(return_value=b'gzipped')
+        with patch.dict(speccache.COMPRESSORS, gzip=compress):
+            pruned = build.get_pruned_build(['/a/'], JSONRenderer())
+            self.assertEqual({'gzip': None}, pruned.encodings)
+            self.assertEqual(b'gzipped', pruned.get_content('gzip'))
+            self.assertEqual(b'gzipped', pruned.get_content('gzip'))
+        self.assertEqual(1, compress.call_count)
+
+    def test_pruned_builds_are_bounded(self):
+        from rest_framework_swagger.views import JSONRenderer
+        build = speccache.SpecBuild(self.get_document(), JSONRenderer())
+        with self.settings(SWAGGER_SETTINGS=dict(CACHED_SWAGGER_SETTINGS,
+                                                 cache_pruned_builds=1)):
+            pruned = build.get_pruned_build(['/a/'], JSONRenderer())
+            self.assertIs(pruned, build.get_pruned_build(['/a/'],
+                                                         JSONRenderer()))
+            build.get_pruned_build(['/b/'], JSONRenderer())
+            self.assertIsNot(pruned, build.get_pruned_build(['/a/'],
+                                                            JSONRenderer()))
+
+    def test_pruned_builds_are_not_pickled(self):
+        import pickle
+        from rest_framework_swagger.views import JSONRenderer
+        build = speccache.SpecBuild(self.get_document(), JSONRenderer())
+        build.get_pruned_build(['/a/'], JSONRenderer())
+
+        unpickled = pickle.loads(pickle.dumps(build))
+        self.assertEqual(build.content, unpickled.content)
+        pruned = unpickled.get_pruned_build(['/a/'], JSONRenderer())
+        self.assertEqual(['/b/'], list(pruned.document['paths']))
+
+    def test_path_definitions_are_computed_once(self):
+        build = speccache.SpecBuild(self.get_document(), Mock(
+            render=Mock(return_value=b'{}')))
+        path_definitions = build.get_path_definitions()
+        self.assertEqual(frozenset(['A', 'Shared', 'Nested']),
+                         path_definitions['/a/'])
+        self.assertIs(path_definitions, build.get_path_definitions())
+
+
+class CommentCountSerializer(serializers.Serializer):
+    count = serializers.IntegerField()
+    updated = serializers.DateTimeField()
+
+
+class CommentsView(ListCreateAPIView):
+    serializer_class = CommentCountSerializer
+    queryset = User.objects.all()
+
+
+class TaggedCommentsView(ListCreateAPIView):
+    """
+    Lists comments
+    ---
+    tags:
+        - comments
+        - moderation
+    """
+    serializer_class = CommentCountSerializer
+    queryset = User.objects.all()
+
+
+class SecretDetailSerializer(serializers.Serializer):
+    level = serializers.IntegerField()
+
+
+class SecretSerializer(serializers.Serializer):
+    detail = SecretDetailSerializer()
+
+
+class SecretView(ListCreateAPIView):
+    serializer_class = SecretSerializer
+    queryset = User.objects.all()
+
+
+class PublicSerializer(serializers.Serializer):
+    updated = serializers.DateTimeField()
+
+
+class PublicView(ListCreateAPIView):
+    serializer_class = PublicSerializer
+    queryset = User.objects.all()
+
+
+@override_settings(SWAGGER_SETTINGS=CACHED_SWAGGER_SETTINGS)
+class ResourceShardTest(SpecCacheMixin, TestCase):
+    def get_view_patterns(self):
+        return [
+            url(r'^users/?$', MockApiView.as_view(), name='users'),
+            url(r'^users/(?P<pk>\d+)/?$', MockApiView.as_view(),
+                name='user'),
+            url(r'^comments/?$', CommentsView.as_view(), name='comments'),
+        ]
+
+    def test_resource_list(self):
+        response = self.client.get("/api-docs/resources/")
+        document = parse_json(response)
+
+        self.assertEqual(200, response.status_code)
+        self.assertIn('ETag', response)
+        self.assertEqual([
+            {'name': 'comments', 'url': '/api-docs/resources/comments',
+             'tags': []},
+            {'name': 'users', 'url': '/api-docs/resources/users',
+             'tags': []},
+        ], document['resources'])
+        self.assertNotIn('paths', document)
+
+    def test_resource_list_tags(self):
+        urls = import_module(settings.ROOT_URLCONF)
+        urls.urlpatterns = patterns(
+            '',
+            url(r'^users/?$', MockApiView.as_view(), name='users'),
+            url(r'^comments/?$', TaggedCommentsView.as_view(),
+                name='comments'),
+            url(r'^', include('rest_framework_swagger.urls')),
+        )
+        swagger_settings = dict(CACHED_SWAGGER_SETTINGS, tags=[
+            {'name': 'moderation', 'description': 'Moderation'}])
+        with self.settings(SWAGGER_SETTINGS=swagger_settings):
+            document = parse_json(self.client.get("/api-docs/resources/"))
+
+        self.assertEqual(['comments', 'moderation'],
+                         document['resources'][0]['tags'])
+        self.assertEqual([], document['resources'][1]['tags'])
+        self.assertEqual([
+            {'name': 'moderation', 'description': 'Moderation'},
+            {'name': 'comments'},
+        ], document['tags'])
+
+    def test_resource_list_is_cached(self):
+        self.client.get("/api-docs/resources/")
+        with patch.object(DocumentationGenerator_1_2, 'generate') as generate, \
+                patch.object(DocumentationGenerator_1_2,
+                             'get_path_tags') as get_path_tags:
+            response = self.client.get("/api-docs/resources/")
+            tags = self.client.get("/api-docs/resources/",
+                                   HTTP_IF_NONE_MATCH=response['ETag'])
+
+        self.assertFalse(generate.called)
+        self.assertFalse(get_path_tags.called)
+        self.assertEqual(304, tags.status_code)
+
+    def test_resource_list_from_spec_file(self):
+        import tempfile
+        urls = import_module(settings.ROOT_URLCONF)
+        urls.urlpatterns = patterns(
+            '',
+            url(r'^users/?$', MockApiView.as_view(), name='users'),
+            url(r'^comments/?$', TaggedCommentsView.as_view(),
+                name='comments'),
+            url(r'^', include('rest_framework_swagger.urls')),
+        )
+        full = self.client.get("/api-docs")
+        with tempfile.NamedTemporaryFile(suffix='.json') as spec_file:
+            spec_file.write(full.content)
+            spec_file.flush()
+            with self.settings(SWAGGER_SETTINGS=dict(
+                    CACHED_SWAGGER_SETTINGS, spec_file=spec_file.name)), \
+                    patch.object(DocumentationGenerator_1_2,
+                                 'get_path_tags') as get_path_tags:
+                document = parse_json(
+                    self.client.get("/api-docs/resources/"))
+
+        self.assertFalse(get_path_tags.called)
+        self.assertEqual(['comments', 'moderation'],
+                         document['resources'][0]['tags'])
+
+    def test_resource_list_access(self):
+        urls = import_module(settings.ROOT_URLCONF)
+        urls.urlpatterns = patterns(
+            '',
+            url(r'^v1/foo/?$', MockApiView.as_view(), name='v1/foo'),
+            url(r'^v1/bar/?$', MockApiView.as_view(), name='v1/bar'),
+            url(r'^v2/baz/?$', MockApiView.as_view(), name='v2/baz'),
+            url(r'^', include('rest_framework_swagger.urls')),
+        )
+        swagger_settings = dict(CACHED_SWAGGER_SETTINGS,
+                                resource_access_handler='app.handler')
+        with self.settings(SWAGGER_SETTINGS=swagger_settings), \
+                patch('rest_framework_swagger.views.SwaggerApiView'
+                      '.handle_resource_access',
+                      lambda view, request, resource:
+                      resource.name.startswith('v1')):
+            document = parse_json(self.client.get("/api-docs/resources/"))
+            responses = [self.client.get(resource['url'])
+                         for resource in document['resources']]
+
+        self.assertEqual(['/api-docs/resources/v1'],
+                         [resource['url'] for resource in
+                          document['resources']])
+        self.assertEqual([200], [r.status_code for r in responses])
+        self.assertEqual(['/v1/bar/', '/v1/foo/'],
+                         sorted(parse_json(responses[0])['paths']))
+
+    def test_resource_document(self):
+        users = parse_json(self.client.get("/api-docs/resources/users"))
+        comments = parse_json(self.client.get(
+            "/api-docs/resources/comments/"))
+        full = parse_json(self.client.get("/api-docs"))
+
+        self.assertEqual(['/users/', '/users/{pk}/'],
+                         sorted(users['paths']))
+        self.assertEqual({}, users['definitions'])
+        self.assertEqual(['/comments/'], list(comments['paths']))
+        self.assertIn('CommentCountSerializer', comments['definitions'])
+        self.assertEqual(full['paths']['/comments/'],
+                         comments['paths']['/comments/'])
+
+    def test_unknown_resource(self):
+        response = self.client.get("/api-docs/resources/groups")
+        self.assertEqual(404, response.status_code)
+
+    def test_resources_are_cached_separately(self):
+        with patch.object(DocumentationGenerator_1_2, 'generate',
+                          return_value={}) as generate:
+            self.client.get("/api-docs/resources/users")
+            self.client.get("/api-docs/resources/users")
+            self.assertEqual(1, generate.call_count)
+            self.client.get("/api-docs/resources/comments")
+            self.assertEqual(2, generate.call_count)
+
+        self.assertNotEqual(get_cache_key(None, '', 'users'),
+                            get_cache_key(None, '', 'comments'))
+        self.assertNotEqual(get_cache_key(None, ''),
+                            get_cache_key(None, '', 'users'))
+
+    def test_resource_from_spec_file(self):
+        import tempfile
+        full = self.client.get("/api-docs")
+        with tempfile.NamedTemporaryFile(suffix='.json') as spec_file:
+            spec_file.write(full.content)
+            spec_file.flush()
+            with self.settings(SWAGGER_SETTINGS=dict(
+                    CACHED_SWAGGER_SETTINGS, spec_file=spec_file.name)):
+                response = self.client.get("/api-docs/resources/users")
+
+        self.assertEqual(['/users/', '/users/{pk}/'],
+                         sorted(parse_json(response)['paths']))
+
+    def test_generated_spec_file_resource_definitions(self):
+        import shutil
+        import tempfile
+        from django.core.management import call_command
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        spec_file = os.path.join(directory, 'swagger.json')
+        call_command('generate_swagger', output=spec_file)
+
+        with self.settings(SWAGGER_SETTINGS=dict(
+                CACHED_SWAGGER_SETTINGS, spec_file=spec_file)):
+            users = parse_json(self.client.get("/api-docs/resources/users"))
+            comments = parse_json(self.client.get(
+                "/api-docs/resources/comments"))
+
+        self.assertEqual({}, users['definitions'])
+        self.assertEqual(['/users/', '/users/{pk}/'],
+                         sorted(users[PATH_DEFINITIONS_EXTENSION]))
+        self.assertEqual(['CommentCountSerializer'],
+                         list(comments['definitions']))
+
+
+@override_settings(SWAGGER_SETTINGS=CACHED_SWAGGER_SETTINGS)
+class PartitionCacheTest(SpecCacheMixin, TestCase):
+    def get_view_patterns(self):
+        return [
+            url(r'^users/?$', MockApiView.as_view(), name='users'),
+            url(r'^app1/', include(patterns(
+                '',
+                url(r'^a/?$', MockApiView.as_view(), name='a'),
+            ), namespace='app1')),
+            url(r'^app2/', include(patterns(
+                '',
+                url(r'^comments/?$', CommentsView.as_view(), name='b'),
+            ), namespace='app2')),
+        ]
+
+    def test_partition_apis(self):
+        apis = UrlParser().get_apis(self.url_patterns)
+        partitions = speccache.partition_apis(apis)
+
+        self.assertEqual(['', 'app1', 'app2'], list(partitions))
+        self.assertEqual(['/app1/a/'],
+                         [api['path'] for api in partitions['app1']])
+
+    def test_document_is_merged_from_partitions(self):
+        document = parse_json(self.client.get("/api-docs"))
+
+        self.assertEqual(['/app1/a/', '/app2/comments/', '/users/'],
+                         sorted(document['paths']))
+        self.assertIn('CommentCountSerializer', document['definitions'])
+
+    def test_invalidate_partition(self):
+        with patch.object(DocumentationGenerator_1_2, 'generate',
+                          return_value={}) as generate:
+            self.client.get("/api-docs")
+            self.assertEqual(3, generate.call_count)
+            self.client.get("/api-docs")
+            self.assertEqual(3, generate.call_count)
+
+            speccache.invalidate_partition('app1')
+            self.client.get("/api-docs")
+            self.assertEqual(4, generate.call_count)
+            self.assertEqual(['/app1/a/'], [
+                api['path'] for api in generate.call_args[0][0]])
+
+    def test_invalidate_partition_of_shared_document(self):
+        with self.settings(SWAGGER_SETTINGS=dict(
+                CACHED_SWAGGER_SETTINGS, cache_alias='default')):
+            speccache.shared_spec_cache.get_backend().clear()
+            with patch.object(DocumentationGenerator_1_2, 'generate',
+                              return_value={}) as generate:
+                self.client.get("/api-docs")
+                speccache.invalidate_partition('')
+                self.client.get("/api-docs")
+            self.assertEqual(4, generate.call_count)
+
+    def test_partitions_are_shared_between_documents(self):
+        with patch.object(DocumentationGenerator_1_2, 'generate',
+                          return_value={}) as generate:
+            self.client.get("/api-docs")
+            self.client.get("/api-docs/resources/app2")
+            self.assertEqual(3, generate.call_count)
+
+    def test_partitions_are_shared_between_processes(self):
+        with self.settings(SWAGGER_SETTINGS=dict(
+                CACHED_SWAGGER_SETTINGS, cache_alias='default')):
+            speccache.shared_spec_cache.get_backend().clear()
+            with patch.object(DocumentationGenerator_1_2, 'generate',
+                              return_value={}) as generate:
+                self.client.get("/api-docs")
+                self.assertEqual(3, generate.call_count)
+
+                # Another process, which invalidates one of the partitions
+                spec_cache.clear()
+                speccache.invalidate_partition('app1')
+                self.client.get("/api-docs/resources/app1")
+                self.assertEqual(4, generate.call_count)
+                self.client.get("/api-docs/resources/app2")
+                self.assertEqual(4, generate.call_count)
+
+
 class UrlParserTest(TestCase):
     def setUp(self):
         self.url_patterns = patterns(
@@ -351,6 +1585,38 @@ class UrlParserTest(TestCase):
         self.assertNotIn("a-view/child", apis)
         self.assertNotIn("a-view/child2", apis)
 
+    def test_resource_index(self):
+        urlparser = UrlParser()
+        apis = urlparser.get_apis(self.url_patterns)
+        index = urlparser.get_resource_index(apis)
+
+        self.assertEqual(urlparser.get_top_level_apis(apis),
+                         index.get_resources())
+        self.assertEqual(['/a-view/', '/a-view/child/', '/a-view/child2/'],
+                         [api['path'] for api in index.get_apis('a-view')])
+        self.assertEqual(['/view-with-param/{var}/'],
+                         [api['path'] for api in
+                          index.get_apis('view-with-param')])
+        self.assertEqual([], index.get_apis('a-view/child'))
+        self.assertEqual(len(apis), sum(
+            len(index.get_apis(r)) for r in index.get_resources()))
+
+    def test_resource_index_base_path(self):
+        url_patterns = patterns(
+            '',
+            url(r'^api/v1/users/?$', MockApiView.as_view()),
+            url(r'^api/v1/users/(?P<pk>\d+)/?$', MockApiView.as_view()),
+            url(r'^api/v1/groups/(?P<pk>\d+)/?$', MockApiView.as_view()),
+        )
+        urlparser = UrlParser()
+        index = urlparser.get_resource_index(
+            urlparser.get_apis(url_patterns))
+
+        self.assertEqual('api/v1/', index.base_path)
+        self.assertEqual(['api/v1/groups', 'api/v1/users'],
+                         index.get_resources())
+        self.assertEqual(2, len(index.get_apis('api/v1/users')))
+
     def test_assemble_endpoint_data(self):
         """
         Tests that the endpoint data is correctly packaged
@@ -403,6 +1669,330 @@ class UrlParserTest(TestCase):
         self.assertEqual('', base_path)
 
 
+class EndpointRegistryTest(TestCase):
+    def setUp(self):
+        self.url_patterns = patterns(
+            '',
+            url(r'a-view/?$', MockApiView.as_view(), name='a test view'),
+            url(r'api/', include(patterns(
+                '',
+                url(r'b-view/?$', MockApiView.as_view(), name='b test view'),
+            ), namespace='api')),
+        )
+        self.urlconf = MockUrlconfModule(self.url_patterns)
+        endpoint_registry.clear()
+
+    def tearDown(self):
+        endpoint_registry.clear()
+
+    def get_apis(self, **kwargs):
+        return UrlParser().get_apis(urlconf=self.urlconf, **kwargs)
+
+    def test_endpoints_are_found_once(self):
+        with patch.object(UrlParser, 'get_endpoints',
+                          wraps=UrlParser().get_endpoints) as get_endpoints:
+            first = self.get_apis()
+            second = self.get_apis(filter_path='api')
+            self.assertEqual(1, get_endpoints.call_count)
+
+            # Excluded namespaces are left out while walking the tree
+            third = self.get_apis(exclude_namespaces=['api'])
+            self.get_apis(exclude_namespaces=['api'])
+            self.assertEqual(2, get_endpoints.call_count)
+
+        self.assertEqual(['/a-view/', '/api/b-view/'],
+                         [api['path'] for api in first])
+        self.assertEqual(['/api/b-view/'], [api['path'] for api in second])
+        self.assertEqual(['/a-view/'], [api['path'] for api in third])
+
+    def test_endpoint_namespaces(self):
+        apis = self.get_apis()
+        self.assertEqual((), apis[0]['namespaces'])
+        self.assertEqual(('api',), apis[1]['namespaces'])
+
+    def test_replaced_urlpatterns(self):
+        self.get_apis()
+        self.urlconf.urlpatterns = self.url_patterns[:1]
+        self.assertEqual(['/a-view/'],
+                         [api['path'] for api in self.get_apis()])
+
+    def test_reset(self):
+        self.get_apis()
+        with patch.object(UrlParser, 'get_endpoints',
+                          return_value=[]) as get_endpoints:
+            self.get_apis()
+            self.assertFalse(get_endpoints.called)
+
+            endpoint_registry.clear()
+            self.assertEqual([], self.get_apis())
+
+            self.get_apis()
+            with self.settings(SWAGGER_SETTINGS=dict(
+                    DEFAULT_SWAGGER_SETTINGS, api_version='2')):
+                self.get_apis()
+        self.assertEqual(2, get_endpoints.call_count)
+
+
+class FilterPathTest(TestCase):
+    def setUp(self):
+        def versioned(version):
+            return url(r'^%s/' % version, include(patterns(
+                '',
+                url(r'^a-view/?$', MockApiView.as_view(), name='a view'),
+                url(r'^b-view/(?P<pk>\d+)/?$', MockApiView.as_view(),
+                    name='b view'),
+            )))
+
+        self.url_patterns = patterns(
+            '',
+            versioned('v1'),
+            versioned('v10'),
+            url(r'^partners/', include(patterns(
+                '',
+                versioned('acme'),
+            ))),
+        )
+        endpoint_registry.clear()
+
+    def tearDown(self):
+        endpoint_registry.clear()
+
+    def get_paths(self, filter_path, **kwargs):
+        urlparser = UrlParser()
+        return [api['path'] for api in urlparser.get_apis(
+            filter_path=filter_path, **kwargs)]
+
+    def test_filter_path(self):
+        urlconf = MockUrlconfModule(self.url_patterns)
+        for kwargs in ({'urlconf': urlconf}, {'patterns': self.url_patterns}):
+            self.assertEqual(['/v1/a-view/', '/v1/b-view/{pk}/'],
+                             self.get_paths('/v1', **kwargs))
+            self.assertEqual(['/v1/b-view/{pk}/'],
+                             self.get_paths('/v1/b-view', **kwargs))
+            self.assertEqual(['/partners/acme/a-view/',
+                              '/partners/acme/b-view/{pk}/'],
+                             self.get_paths('/partners/acme', **kwargs))
+            self.assertEqual([], self.get_paths('/v2', **kwargs))
+            self.assertEqual(6, len(self.get_paths(None, **kwargs)))
+
+    def test_path_trie(self):
+        endpoints = UrlParser().get_endpoints(self.url_patterns)
+        trie = PathTrie(endpoints)
+
+        self.assertEqual(endpoints, trie.get())
+        self.assertEqual(endpoints[:2], trie.get('/v1'))
+        self.assertEqual(endpoints[:2], trie.get('v1'))
+        self.assertEqual(endpoints[4:], trie.get('/partners'))
+        self.assertEqual([], trie.get('/v'))
+
+    def test_resolvers_are_pruned(self):
+        urlparser = UrlParser()
+        can_match = urlparser.__can_match_filter_path__
+        self.assertTrue(can_match('/v1/', '/v1/a-view'))
+        self.assertTrue(can_match('/v', '/v1'))
+        self.assertTrue(can_match('/v1/a-view/', '/v1'))
+        self.assertFalse(can_match('/v10/', '/v1'))
+        self.assertFalse(can_match('/partners/', '/v1'))
+
+        # Loading the patterns included under /v2/ would fail
+        url_patterns = self.url_patterns + [RegexURLResolver(
+            r'^v2/', 'rest_framework_swagger.missing_urls')]
+        apis = urlparser.get_endpoints(url_patterns, filter_path='/v1')
+        self.assertEqual(2, len(apis))
+
+
+class ExclusionMatcherTest(TestCase):
+    def setUp(self):
+        self.url_patterns = patterns(
+            '',
+            url(r'^public/?$', MockApiView.as_view(), name='public'),
+            url(r'^internal-a/?$', MockApiView.as_view(), name='internal-a'),
+            url(r'^internal-b/?$', MockApiView.as_view(), name='internal-b'),
+            url(r'^admin/', include(patterns(
+                '',
+                url(r'^users/?$', MockApiView.as_view(), name='users'),
+            ), namespace='admin')),
+            url(r'^partner-x/', include(patterns(
+                '',
+                url(r'^users/?$', MockApiView.as_view(), name='users'),
+            ), namespace='partner-x')),
+            RegexURLResolver(r'^hidden/',
+                             'rest_framework_swagger.missing_urls',
+                             namespace='hidden-api'),
+        )
+
+    def get_paths(self, **kwargs):
+        return [api['path'] for api in UrlParser().get_apis(
+            self.url_patterns, **kwargs)]
+
+    def test_matcher(self):
+        matcher = get_exclusion_matcher(['exact', 'internal-*', 'admin:*',
+                                         'v?'])
+        self.assertIs(matcher, get_exclusion_matcher(
+            ['exact', 'internal-*', 'admin:*', 'v?']))
+        self.assertEqual(set(['exact']), matcher.names)
+
+        self.assertTrue(matcher.matches('exact'))
+        self.assertTrue(matcher.matches('internal-users'))
+        self.assertTrue(matcher.matches('v1'))
+        self.assertTrue(matcher.matches('users', ('admin',)))
+        self.assertTrue('internal-' in matcher)
+        self.assertFalse(matcher.matches('users'))
+        self.assertFalse(matcher.matches('v10'))
+        self.assertFalse(matcher.matches('exact-ish'))
+        self.assertFalse(matcher.matches(None))
+        self.assertFalse(get_exclusion_matcher(None))
+
+    def test_exclude_url_name_globs(self):
+        self.assertEqual(
+            ['/public/', '/partner-x/users/'],
+            self.get_paths(exclude_url_names=['internal-*', 'admin:*'],
+                           exclude_namespaces=['hidden-*']))
+
+    def test_excluded_namespaces_are_not_loaded(self):
+        self.assertEqual(
+            ['/public/', '/internal-a/', '/internal-b/'],
+            self.get_paths(exclude_namespaces=['admin', 'partner-*',
+                                               'hidden-api']))
+
+
+class PathParametersTest(TestCase):
+    uuid_pattern = ('[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}'
+                    '-[0-9a-f]{12}')
+
+    def test_named_groups(self):
+        groups = get_named_groups(
+            r'^api/(?P<version>v(1|2))/users/(?P<pk>\d+)/'
+            r'(?P<slug>[\w)-]+)/$')
+        self.assertEqual({
+            'version': 'v(1|2)',
+            'pk': r'\d+',
+            'slug': r'[\w)-]+',
+        }, groups)
+
+    def test_parameter_types(self):
+        def schema(pattern):
+            parameter = get_path_parameter('param', pattern)
+            self.assertEqual('path', parameter['in'])
+            self.assertTrue(parameter['required'])
+            return dict((key, value) for key, value in parameter.items()
+                        if key in ('type', 'format', 'pattern'))
+
+        self.assertEqual({'type': 'integer', 'format': 'int64'},
+                         schema(r'\d+'))
+        self.assertEqual({'type': 'integer', 'format': 'int64'},
+                         schema('[0-9]{1,4}'))
+        self.assertEqual({'type': 'string', 'format': 'uuid'},
+                         schema(self.uuid_pattern))
+        self.assertEqual({'type': 'string', 'format': 'uuid'},
+                         schema('[0-9a-fA-F]{8}(-?[0-9a-fA-F]{4}){3}'
+                                '-?[0-9a-fA-F]{12}'))
+        for pattern in ('[0-9a-f-]+', '.{36}', '[0-9a-f-]{36}'):
+            self.assertEqual({'type': 'string', 'pattern': pattern},
+                             schema(pattern))
+        self.assertEqual({'type': 'string', 'pattern': r'[-\w]+'},
+                         schema(r'[-\w]+'))
+        self.assertEqual({'type': 'string'}, schema('[^/.]+'))
+        self.assertEqual({'type': 'string'}, schema(None))
+        self.assertEqual({'type': 'string'}, schema('(unbalanced'))
+
+    def test_endpoint_path_parameters(self):
+        url_patterns = patterns(
+            '',
+            url(r'^(?P<version>v\d)/', include(patterns(
+                '',
+                url(r'^users/(?P<pk>\d+)/(?P<slug>[-\w]+)/(\w+)/?$',
+                    MockApiView.as_view()),
+            ))),
+        )
+        apis = UrlParser().get_apis(url_patterns)
+        self.assertEqual('/{version}/users/{pk}/{slug}/{var}/',
+                         apis[0]['path'])
+        parameters = apis[0]['path_parameters']
+        self.assertEqual(['version', 'pk', 'slug', 'var'],
+                         [p['name'] for p in parameters])
+        self.assertEqual(['string', 'integer', 'string', 'string'],
+                         [p['type'] for p in parameters])
+        self.assertEqual(r'v\d', parameters[0]['pattern'])
+
+    def test_documented_parameters(self):
+        url_patterns = patterns(
+            '',
+            url(r'^users/(?P<pk>\d+)/?$', MockApiView.as_view()),
+        )
+        urlparser = UrlParser()
+        apis = urlparser.get_apis(url_patterns)
+        generator = DocumentationGenerator_1_2()
+
+        with patch('rest_framework_swagger.introspectors.re.findall') \
+                as findall:
+            operations = generator.get_operations(apis[0], apis)
+        self.assertFalse(findall.called)
+
+        parameters = operations['get']['parameters']
+        self.assertEqual([{
+            'name': 'pk',
+            'type': 'integer',
+            'format': 'int64',
+            'in': 'path',
+            'required': True,
+        }], [p for p in parameters if p['in'] == 'path'])
+
+
+class IterEndpointsTest(TestCase):
+    def test_deep_include_tree(self):
+        url_patterns = patterns(
+            '', url(r'^leaf/?$', MockApiView.as_view(), name='leaf'))
+        for level in range(1500):
+            url_patterns = patterns(
+                '',
+                url(r'^s%d/?$' % level, MockApiView.as_view()),
+                url(r'^l%d/' % level, include(url_patterns)),
+            )
+
+        apis = list(UrlParser().iter_endpoints(url_patterns))
+
+        self.assertEqual(1501, len(apis))
+        self.assertEqual('/s1499/', apis[0]['path'])
+        self.assertEqual('/l1499/s1498/', apis[1]['path'])
+        self.assertEqual('leaf', apis[-1]['pattern'].name)
+
+    def test_endpoints_are_yielded_lazily(self):
+        url_patterns = patterns(
+            '',
+            url(r'^a-view/?$', MockApiView.as_view()),
+            RegexURLResolver(r'^b/', 'rest_framework_swagger.missing_urls'),
+        )
+        endpoints = UrlParser().iter_endpoints(url_patterns)
+        self.assertEqual('/a-view/', next(endpoints)['path'])
+        self.assertRaises(ImportError, next, endpoints)
+
+    def test_namespaces_and_exclusions(self):
+        url_patterns = patterns(
+            '',
+            url(r'^a/', include(patterns(
+                '',
+                url(r'^b/', include(patterns(
+                    '',
+                    url(r'^c/?$', MockApiView.as_view(), name='c'),
+                    url(r'^d/?$', MockApiView.as_view(), name='d'),
+                ), namespace='inner')),
+                url(r'^e/?$', MockApiView.as_view(), name='e'),
+            ), namespace='outer')),
+        )
+        urlparser = UrlParser()
+
+        apis = list(urlparser.iter_endpoints(url_patterns,
+                                             exclude_url_names=['d']))
+        self.assertEqual(['/a/b/c/', '/a/e/'], [a['path'] for a in apis])
+        self.assertEqual([('outer', 'inner'), ('outer',)],
+                         [a['namespaces'] for a in apis])
+
+        apis = list(urlparser.iter_endpoints(url_patterns,
+                                             exclude_namespaces=['inner']))
+        self.assertEqual(['/a/e/'], [a['path'] for a in apis])
+
+
 class NestedUrlParserTest(TestCase):
     def setUp(self):
         class FuzzyApiView(APIView):
@@ -626,6 +2216,197 @@ class DocumentationGeneratorTest(TestCase, DocumentationGeneratorMixin):
 
         self.assertIn(CommentSerializer, serializers)
 
+    def test_viewset_patterns_scale_linearly(self):
+        class MyViewSet(ModelViewSet):
+            serializer_class = CommentCountSerializer
+            model = User
+
+        class CountingList(list):
+            passes = 0
+
+            def __iter__(self):
+                self.passes += 1
+                return super(CountingList, self).__iter__()
+
+        def count_passes(endpoints):
+            url_patterns = patterns('', *[
+                url(r'^items%d/$' % i, MyViewSet.as_view({'get': 'list'}))
+                for i in range(endpoints)])
+            apis = CountingList(UrlParser().get_apis(url_patterns))
+            generator = self.get_documentation_generator()
+            generator.generate(apis)
+            generator.get_models(apis)
+            return apis.passes
+
+        # Every endpoint of the ViewSet shares one index of its patterns,
+        # rather than scanning the list of APIs again
+        self.assertEqual(count_passes(5), count_passes(50))
+
+    def test_get_callback_patterns(self):
+        class MyViewSet(ModelViewSet):
+            serializer_class = CommentCountSerializer
+            model = User
+
+        url_patterns = patterns(
+            '',
+            url(r'^a/$', MyViewSet.as_view({'get': 'list'})),
+            url(r'^a/(?P<pk>\d+)/$', MyViewSet.as_view({'get': 'retrieve'})),
+            url(r'^b/$', MockApiView.as_view()),
+        )
+        apis = UrlParser().get_apis(url_patterns)
+        generator = self.get_documentation_generator()
+        index = generator.get_callback_patterns(apis)
+
+        self.assertEqual([api['pattern'] for api in apis[:2]],
+                         index[MyViewSet])
+        self.assertIs(index, generator.get_callback_patterns(apis))
+
+    def test_get_models_reuses_generated_serializers(self):
+        url_patterns = patterns(
+            '', url(r'^comments/?$', CommentsView.as_view()))
+        apis = UrlParser().get_apis(url_patterns)
+        expected = DocumentationGenerator_1_2().get_models(apis)
+
+        docgen = DocumentationGenerator_1_2()
+        docgen.generate(apis)
+        with patch.object(docgen, '_get_serializer_set') as serializer_set:
+            models = docgen.get_models(apis)
+            self.assertFalse(serializer_set.called)
+            docgen.get_models(list(apis))
+            self.assertTrue(serializer_set.called)
+
+        self.assertIn('CommentCountSerializer', models)
+        self.assertEqual(expected, models)
+
+    def get_concurrent_apis(self):
+        url_patterns = patterns('', *[
+            url(r'^comments%d/?$' % i, CommentsView.as_view())
+            for i in range(8)] + [
+            url(r'^a-view/?$', MockApiView.as_view()),
+        ])
+        return UrlParser().get_apis(url_patterns)
+
+    def test_concurrent_generation(self):
+        import threading
+        apis = self.get_concurrent_apis()
+        docgen = DocumentationGenerator_1_2()
+        expected = docgen.generate(apis), docgen.get_models(apis)
+
+        threads = set()
+        get_operations = DocumentationGenerator_1_2.get_operations
+
+        def record_thread(generator, *args, **kwargs):
+            threads.add(threading.current_thread().name)
+            return get_operations(generator, *args, **kwargs)
+
+        with self.settings(SWAGGER_SETTINGS=dict(
+                DEFAULT_SWAGGER_SETTINGS, introspection_workers=4)):
+            with patch.object(DocumentationGenerator_1_2, 'get_operations',
+                              autospec=True, side_effect=record_thread):
+                docgen = DocumentationGenerator_1_2()
+                paths = docgen.generate(apis)
+                models = docgen.get_models(apis)
+
+        self.assertEqual(expected, (paths, models))
+        self.assertNotIn(threading.current_thread().name, threads)
+
+    def test_concurrent_generation_closes_connections_per_worker(self):
+        apis = self.get_concurrent_apis()
+        connection = Mock()
+
+        with self.settings(SWAGGER_SETTINGS=dict(
+                DEFAULT_SWAGGER_SETTINGS, introspection_workers=4)):
+            with patch('rest_framework_swagger.docgenerator.connections') \
+                    as connections:
+                connections.all.return_value = [connection]
+                DocumentationGenerator_1_2().generate(apis)
+
+        self.assertEqual(4, connection.close.call_count)
+
+    def test_concurrent_generation_isolates_failures(self):
+        apis = self.get_concurrent_apis()
+        get_operations = DocumentationGenerator_1_2.get_operations
+
+        def fail_on_a_view(generator, api, *args, **kwargs):
+            if api['path'] == '/a-view/':
+                raise ValueError(api['path'])
+            return get_operations(generator, api, *args, **kwargs)
+
+        with self.settings(SWAGGER_SETTINGS=dict(
+                DEFAULT_SWAGGER_SETTINGS, introspection_workers=4)):
+            with patch.object(DocumentationGenerator_1_2, 'get_operations',
+                              autospec=True, side_effect=fail_on_a_view):
+                with patch('rest_framework_swagger.docgenerator.logger') \
+                        as logger:
+                    paths = DocumentationGenerator_1_2().generate(apis)
+
+        self.assertEqual(8, len(paths))
+        self.assertNotIn('/a-view/', paths)
+        logger.exception.assert_called_once_with(
+            "Could not introspect '%s'", '/a-view/')
+
+    def test_serializer_fields_are_cached(self):
+        class NestedSerializer(serializers.Serializer):
+            counts = CommentCountSerializer(many=True)
+            total = serializers.IntegerField()
+
+        serializer_cache.clear()
+        self.addCleanup(serializer_cache.clear)
+        with patch.object(CommentCountSerializer, 'get_fields',
+                          autospec=True,
+                          side_effect=serializers.Serializer.get_fields) \
+                as get_fields:
+            for request in range(2):
+                docgen = DocumentationGenerator_1_2()
+                serializer_set = docgen._find_field_serializers(
+                    [NestedSerializer])
+                data = docgen._get_serializer_fields(CommentCountSerializer)
+
+        self.assertEqual(1, get_fields.call_count)
+        self.assertEqual(['count', 'updated'], list(data['fields']))
+        self.assertEqual([CommentCountSerializer], [
+            type(serializer) for serializer in serializer_set])
+
+        self.assertIs(data, docgen._get_serializer_fields(
+            CommentCountSerializer))
+
+    def test_nested_serializer_fields_are_cached(self):
+        url_patterns = patterns(
+            '', url(r'^secret/?$', SecretView.as_view()))
+        apis = UrlParser().get_apis(url_patterns)
+
+        serializer_cache.clear()
+        self.addCleanup(serializer_cache.clear)
+        with patch.object(SecretDetailSerializer, 'get_fields',
+                          autospec=True,
+                          side_effect=serializers.Serializer.get_fields) \
+                as get_fields:
+            for request in range(2):
+                models = DocumentationGenerator_1_2().get_models(apis)
+
+        self.assertEqual(1, get_fields.call_count)
+        self.assertEqual(['level'], list(
+            models['SecretDetailSerializer']['properties']))
+
+    def test_body_parameters_are_cached(self):
+        serializer_cache.clear()
+        self.addCleanup(serializer_cache.clear)
+        introspector = APIViewMethodIntrospector(APIViewIntrospector(
+            CommentsView, '/', RegexURLResolver(r'^/$', ''), AnonymousUser()),
+            'POST')
+        with patch.object(CommentCountSerializer, 'get_fields',
+                          autospec=True,
+                          side_effect=serializers.Serializer.get_fields) \
+                as get_fields:
+            parameters = introspector.build_body_parameters()
+            parameters[0]['in'] = 'query'
+            self.assertEqual(parameters[1:],
+                             introspector.build_body_parameters()[1:])
+            self.assertEqual('body',
+                             introspector.build_body_parameters()[0]['in'])
+
+        self.assertEqual(1, get_fields.call_count)
+
     def test_get_serializer_fields(self):
         docgen = self.get_documentation_generator()
         fields = docgen._get_serializer_fields(CommentSerializer)
@@ -1541,6 +3322,148 @@ class YAMLDocstringParserTests(TestCase, DocumentationGeneratorMixin):
         doc_parser = introspector.get_yaml_parser()
         self.assertEqual(doc_parser.object['param'], 'my param')
 
+    def test_yaml_parser_is_memoized(self):
+        class AnAPIView(APIView):
+            """
+            ---
+            omit_serializer: true
+            """
+            def get(self):
+                """
+                ---
+                param: my param
+                """
+                pass
+
+        class_introspector = self.make_introspector(AnAPIView)
+        introspector = APIViewMethodIntrospector(class_introspector, 'GET')
+        doc_parser = introspector.get_yaml_parser()
+
+        self.assertIs(doc_parser, introspector.get_yaml_parser())
+        self.assertEqual({'omit_serializer': True, 'param': 'my param'},
+                         doc_parser.object)
+
+    def test_docstrings_are_parsed_once(self):
+        class AnAPIView(APIView):
+            def get(self):
+                """
+                ---
+                param: my param
+                """
+                pass
+
+        yaml_cache.clear()
+        with patch('yaml.load', side_effect=yaml.load) as load:
+            for request in range(2):
+                introspector = APIViewMethodIntrospector(
+                    self.make_introspector(AnAPIView), 'GET')
+                doc_parser = introspector.get_yaml_parser()
+                self.assertEqual('my param', doc_parser.object['param'])
+
+        self.assertEqual(1, load.call_count)
+
+    def test_changed_docstring_is_parsed_again(self):
+        class AnAPIView(APIView):
+            def get(self):
+                """
+                ---
+                param: my param
+                """
+                pass
+
+        introspector = APIViewMethodIntrospector(
+            self.make_introspector(AnAPIView), 'GET')
+        introspector.get_yaml_parser()
+
+        introspector = APIViewMethodIntrospector(
+            self.make_introspector(AnAPIView), 'GET')
+        introspector.get_docs = lambda: '---\nparam: your param'
+        self.assertEqual('your param',
+                         introspector.get_yaml_parser().object['param'])
+
+    def test_parse_docstring_method(self):
+        @parse_docstring
+        class AnAPIView(APIView):
+            @parse_docstring
+            def get(self):
+                """
+                ---
+                param: my param
+                """
+                pass
+
+        self.assertEqual({'param': 'my param'}, AnAPIView.get.swagger_yaml)
+        introspector = APIViewMethodIntrospector(
+            self.make_introspector(AnAPIView), 'GET')
+        with patch('rest_framework_swagger.introspectors.trim_docstring') \
+                as trim:
+            doc_parser = introspector.get_yaml_parser()
+
+        self.assertFalse(trim.called)
+        self.assertEqual('my param', doc_parser.object['param'])
+
+    def test_parse_docstring_fbv(self):
+        @parse_docstring
+        @api_view(['POST'])
+        def SerializedAPI(request):
+            """
+            ---
+            omit_serializer: true
+            """
+            return "blarg"
+
+        introspector = WrappedAPIViewMethodIntrospector(
+            self.make_fbv_introspector(SerializedAPI), 'POST')
+        with patch('rest_framework_swagger.introspectors.trim_docstring') \
+                as trim:
+            self.assertTrue(introspector.get_yaml_parser()
+                            .should_omit_serializer())
+        self.assertFalse(trim.called)
+
+    def test_parse_docstring_invalid_yaml(self):
+        def get(self):
+            """
+            ---
+            param: [my param
+            """
+
+        self.assertRaises(yaml.YAMLError, parse_docstring, get)
+
+    def test_swagger_yaml_class_attribute(self):
+        class AnAPIView(APIView):
+            """
+            ---
+            param: ignored
+            """
+            swagger_yaml = {'param': 'my param'}
+
+            def get(self):
+                pass
+
+        introspector = APIViewMethodIntrospector(
+            self.make_introspector(AnAPIView), 'GET')
+        self.assertEqual('my param',
+                         introspector.get_yaml_parser().object['param'])
+
+    def test_yaml_cache(self):
+        cache = YAMLCache(maxsize=2)
+        first = cache.load('---\nparam: my param')
+        self.assertIs(first, cache.load('---\nparam: my param'))
+        self.assertEqual(({'param': 'my param'}, None), first)
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
+
+        cache.load('---\nparam: your param')
+        cache.load('---\nparam: their param')
+        self.assertEqual(2, len(cache))
+        self.assertIsNot(first, cache.load('---\nparam: my param'))
+        self.assertEqual((1, 4), (cache.hits, cache.misses))
+
+    def test_yaml_cache_loads_safely(self):
+        obj, error = YAMLCache().load(
+            '---\nparam: !!python/object/apply:os.getcwd []')
+        self.assertIsNone(obj)
+        self.assertIsInstance(error, yaml.YAMLError)
+
     def test_yaml_loader_class_yaml(self):
         class AnAPIView(APIView):
             """
@@ -1,5 +1,6 @@
 import re
 import os
+import threading
 from importlib import import_module
 
 from django.conf import settings
@@ -11,9 +12,266 @@ from django.contrib.admindocs.views import simplify_regex
 from rest_framework.views import APIView
 
 from .apidocview import APIDocView
+from .compat import OrderedDict
 from . import SWAGGER_SETTINGS
 
 
+def split_path(path):
+    """
+    Returns the segments of a simplified URL path, without its leading slash
+    """
+    if path.startswith('/'):
+        path = path[1:]
+    return path.split('/')
+
+
+class PathTrie(object):
+    """
+    Index of endpoints by the segments of their simplified paths, so that
+    the endpoints found under a path prefix are looked up rather than
+    matched one by one. Every node keeps the endpoints below it in URL
+    order.
+    """
+    def __init__(self, endpoints=()):
+        self.endpoints = []
+        self.children = {}
+        for endpoint in endpoints:
+            self.add(endpoint)
+
+    def add(self, endpoint):
+        node = self
+        node.endpoints.append(endpoint)
+        for segment in split_path(endpoint['simplified_path']):
+            child = node.children.get(segment)
+            if child is None:
+                child = node.children[segment] = PathTrie()
+            node = child
+            node.endpoints.append(endpoint)
+
+    def get(self, path=None):
+        """
+        Returns the endpoints whose path is path, or starts with path
+        followed by a slash
+        """
+        node = self
+        if path is not None:
+            for segment in split_path(path):
+                node = node.children.get(segment)
+                if node is None:
+                    return []
+        return node.endpoints
+
+
+def get_named_groups(regex):
+    """
+    Returns the named groups of a URL regex, mapped to their sub-patterns.
+    Unlike simplify_regex, groups nested in a named group are kept whole.
+    """
+    groups = {}
+    start = regex.find('(?P<')
+    while start != -1:
+        name_end = regex.find('>', start)
+        if name_end == -1:
+            break
+        name = regex[start + 4:name_end]
+        index, depth, in_class = name_end + 1, 1, False
+        while index < len(regex):
+            char = regex[index]
+            if char == '\\':
+                index += 1
+            elif in_class:
+                in_class = char != ']'
+            elif char == '[':
+                in_class = True
+            elif char == '(':
+                depth += 1
+            elif char == ')':
+                depth -= 1
+                if depth == 0:
+                    break
+            index += 1
+        groups[name] = regex[name_end + 1:index]
+        start = regex.find('(?P<', index)
+    return groups
+
+
+# Sub-patterns which match any path segment, and do not constrain a parameter
+UNCONSTRAINED_PATTERNS = set(['[^/]+', '[^/.]+', '.+', '.*', '[^/]*'])
+
+SAMPLE_UUID = '6fa459ea-ee8a-3ca4-894e-db77e160355e'
+# Values a UUID-shaped pattern rejects, so that loose patterns such as
+# `[0-9a-f-]+` or `.{36}` are not documented as UUIDs
+NON_UUID_SAMPLES = (
+    'xyz', 'abc', '1', '-',
+    SAMPLE_UUID.replace('6', 'g'),
+    SAMPLE_UUID[1:] + '-',
+)
+
+
+def get_path_parameter(name, pattern=None):
+    """
+    Returns the Swagger parameter of a path parameter. Its type is guessed
+    from the sub-pattern of its named group, ie. `[0-9]+` is an integer.
+    """
+    parameter = {
+        'name': name,
+        'type': 'string',
+        'in': 'path',
+        'required': True,
+    }
+    if pattern is None or pattern in UNCONSTRAINED_PATTERNS:
+        return parameter
+
+    try:
+        matcher = re.compile('^(?:%s)$' % pattern)
+    except re.error:
+        return parameter
+
+    def matches(value):
+        return matcher.match(value) is not None
+
+    if matches('123') and not matches('abc') and not matches('-'):
+        parameter['type'] = 'integer'
+        parameter['format'] = 'int64'
+    elif matches(SAMPLE_UUID) and \
+            not any(matches(value) for value in NON_UUID_SAMPLES):
+        parameter['format'] = 'uuid'
+    else:
+        parameter['pattern'] = pattern
+    return parameter
+
+
+class ResourceIndex(object):
+    """
+    APIs grouped by top level resource (ie. swagger 'resources'), as built
+    by UrlParser.get_resource_index.
+
+    base_path -- path every resource is found under
+    resources -- resource paths, mapped to their APIs in URL order
+    """
+    def __init__(self, base_path, resources):
+        self.base_path = base_path
+        self.resources = resources
+
+    def get_resources(self):
+        return list(self.resources)
+
+    def get_apis(self, resource):
+        return self.resources.get(resource, [])
+
+
+class ExclusionMatcher(object):
+    """
+    Names excluded by the `exclude_url_names` or `exclude_namespaces`
+    settings, compiled into a set of plain names and a single regular
+    expression for glob patterns, ie. `internal-*`.
+
+    Names are also matched qualified by the namespaces they are included in,
+    ie. `admin:*` matches every URL name of the `admin` namespace.
+    """
+    glob_re = re.compile(r'[*?]')
+
+    def __init__(self, names=None):
+        self.names = set()
+        globs = []
+        for name in names or []:
+            if self.glob_re.search(name) is None:
+                self.names.add(name)
+            else:
+                globs.append(self.translate(name))
+        self.regex = None
+        if globs:
+            self.regex = re.compile('^(?:%s)$' % '|'.join(globs))
+
+    def translate(self, glob):
+        return ''.join('.*' if part == '*' else '.' if part == '?'
+                       else re.escape(part)
+                       for part in re.split(r'([*?])', glob) if part)
+
+    def matches(self, name, namespaces=()):
+        """
+        Returns True if name, or name qualified by namespaces, is excluded
+        """
+        if name is None:
+            return False
+        names = [name]
+        if namespaces:
+            names.append(':'.join(namespaces + (name,)))
+        for candidate in names:
+            if candidate in self.names:
+                return True
+            if self.regex is not None and \
+                    self.regex.match(candidate) is not None:
+                return True
+        return False
+
+    def __contains__(self, name):
+        return self.matches(name)
+
+    def __bool__(self):
+        return bool(self.names or self.regex)
+    __nonzero__ = __bool__
+
+
+_exclusion_matchers = {}
+
+
+def get_exclusion_matcher(names):
+    """
+    Returns the ExclusionMatcher of a list of names, which is only compiled
+    once per list
+    """
+    if isinstance(names, ExclusionMatcher):
+        return names
+    key = tuple(names or ())
+    matcher = _exclusion_matchers.get(key)
+    if matcher is None:
+        matcher = _exclusion_matchers[key] = ExclusionMatcher(key)
+    return matcher
+
+
+class EndpointRegistry(object):
+    """
+    Flattened endpoints of each urlconf, so that the URL tree is only walked
+    once. The endpoints of a urlconf are found again when its `urlpatterns`
+    are replaced, when settings change or after clear().
+
+    Namespaces are excluded while walking the tree, so that the patterns
+    they include are never loaded.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def get_endpoints(self, urls, urlparser, exclude_namespaces=None):
+        """
+        Returns the endpoints of a urlconf module, indexed by path
+
+        urls -- urlconf module
+        urlparser -- UrlParser which flattens the URL tree
+        exclude_namespaces -- list of namespaces to ignore (optional)
+        """
+        patterns = urls.urlpatterns
+        key = (urls, tuple(exclude_namespaces or ()))
+        with self._lock:
+            cached_patterns, endpoints = self._endpoints.get(key, (None, None))
+        if endpoints is not None and cached_patterns is patterns:
+            return endpoints
+
+        endpoints = PathTrie(urlparser.get_endpoints(
+            patterns, exclude_namespaces=exclude_namespaces))
+        with self._lock:
+            self._endpoints[key] = (patterns, endpoints)
+        return endpoints
+
+    def clear(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+endpoint_registry = EndpointRegistry()
+
+
 class UrlParser(object):
 
     __relative_path_matcher__ = re.compile(
@@ -28,31 +286,128 @@ class UrlParser(object):
         exclude_url_names -- list of url names to ignore (optional)
         exclude_namespaces -- list of namespaces to ignore (optional)
         """
-        exclude_url_names = exclude_url_names or []
-        exclude_namespaces = exclude_namespaces or []
         filter_path = self.__make_absolute__(filter_path)
 
-        if patterns is None and urlconf is not None:
+        if patterns is not None:
+            endpoints = self.get_endpoints(
+                patterns, filter_path=filter_path,
+                exclude_namespaces=exclude_namespaces)
+        else:
+            if urlconf is None:
+                urlconf = settings.ROOT_URLCONF
             if isinstance(urlconf, six.string_types):
                 urls = import_module(urlconf)
             else:
                 urls = urlconf
-            patterns = urls.urlpatterns
-        elif patterns is None and urlconf is None:
-            urls = import_module(settings.ROOT_URLCONF)
-            patterns = urls.urlpatterns
+            endpoints = endpoint_registry.get_endpoints(
+                urls, self, exclude_namespaces=exclude_namespaces)
+            endpoints = endpoints.get(filter_path)
 
-        apis = self.__flatten_patterns_tree__(
-            patterns,
-            filter_path=filter_path,
+        return self.filter_endpoints(
+            endpoints,
             exclude_url_names=exclude_url_names,
-            exclude_namespaces=exclude_namespaces,
         )
-        if filter_path is not None:
-            filter_path = self.__make_relative__(filter_path, strip=True)
-            return self.get_filtered_apis(apis, filter_path)
 
-        return apis
+    def get_endpoints(self, patterns, filter_path=None,
+                      exclude_namespaces=None):
+        """
+        Returns the API endpoints found in a list of URL patterns, along
+        with the namespaces they are included in. Unlike get_apis, nothing
+        is filtered out based on url names.
+
+        patterns -- urlpatterns list
+        filter_path -- only return the endpoints found under this path
+                       (optional)
+        exclude_namespaces -- list of namespaces to ignore (optional)
+        """
+        return list(self.iter_endpoints(
+            patterns, filter_path=filter_path,
+            exclude_namespaces=exclude_namespaces))
+
+    def iter_endpoints(self, patterns, prefix='', filter_path=None,
+                       exclude_url_names=None, exclude_namespaces=None,
+                       namespaces=()):
+        """
+        Yields the API endpoints found in a URL tree lazily, in URL order.
+        Included patterns are walked with an explicit stack of prefixes and
+        namespaces rather than by recursion, so deep include() trees neither
+        grow the call stack nor build intermediate lists.
+
+        patterns -- urlpatterns list
+        prefix -- (optional) Prefix for URL pattern
+        filter_path -- (optional) only yield the endpoints found under this path
+        exclude_url_names -- (optional) list of url names to ignore
+        exclude_namespaces -- (optional) list of namespaces to ignore
+        namespaces -- (optional) Namespaces the patterns are included in
+        """
+        exclude_url_names = get_exclusion_matcher(exclude_url_names)
+        exclude_namespaces = get_exclusion_matcher(exclude_namespaces)
+        stack = [(iter(patterns), prefix, namespaces)]
+
+        while stack:
+            pattern_iter, prefix, namespaces = stack[-1]
+            for pattern in pattern_iter:
+                if isinstance(pattern, RegexURLPattern):
+                    endpoint_data = self.__assemble_endpoint_data__(
+                        pattern, prefix, filter_path=filter_path,
+                        namespaces=namespaces)
+
+                    if endpoint_data is None or exclude_url_names.matches(
+                            pattern.name, namespaces):
+                        continue
+
+                    yield endpoint_data
+
+                elif isinstance(pattern, RegexURLResolver):
+
+                    # Skipped before its patterns are loaded
+                    if exclude_namespaces.matches(pattern.namespace,
+                                                  namespaces):
+                        continue
+
+                    pref = prefix + pattern.regex.pattern
+                    if filter_path is not None and \
+                            not self.__can_match_filter_path__(
+                                simplify_regex(pref), filter_path):
+                        continue
+
+                    if pattern.namespace is not None:
+                        pattern_namespaces = namespaces + (pattern.namespace,)
+                    else:
+                        pattern_namespaces = namespaces
+                    # Resumes with the next pattern of this level once the
+                    # included ones are exhausted
+                    stack.append((iter(pattern.url_patterns), pref,
+                                  pattern_namespaces))
+                    break
+            else:
+                stack.pop()
+
+    def filter_endpoints(self, endpoints, exclude_url_names=None,
+                         exclude_namespaces=None):
+        """
+        Returns the endpoints which are neither named in exclude_url_names
+        nor included in exclude_namespaces
+
+        endpoints -- list of endpoints as returned by self.get_endpoints
+        """
+        exclude_url_names = get_exclusion_matcher(exclude_url_names)
+        exclude_namespaces = get_exclusion_matcher(exclude_namespaces)
+        if not exclude_url_names and not exclude_namespaces:
+            return list(endpoints)
+        filtered_list = []
+
+        for endpoint in endpoints:
+            namespaces = endpoint['namespaces']
+            if exclude_url_names.matches(endpoint['pattern'].name,
+                                         namespaces):
+                continue
+            if any(exclude_namespaces.matches(namespace, namespaces[:index])
+                   for index, namespace in enumerate(namespaces)):
+                continue
+            filtered_list.append(endpoint)
+
+        return filtered_list
 
     def get_filtered_apis(self, apis, filter_path):
         filtered_list = []
@@ -69,32 +424,45 @@ class UrlParser(object):
 
         apis -- list of APIs as returned by self.get_apis
         """
-        root_paths = set()
+        return self.get_resource_index(apis).get_resources()
+
+    def get_resource_index(self, apis):
+        """
+        Groups APIs by top level resource, in a single pass over them
+
+        apis -- list of APIs as returned by self.get_apis
+        """
         api_paths = [endpoint['path'].strip("/") for endpoint in apis]
+        api_path_set = set(api_paths)
+        path_bases = []
+        root_paths = set()
 
         for path in api_paths:
             #  If a URLs /resource/ and /resource/{pk} exist, use the base
             #  as the resource. If there is no base resource URL, then include
             path_base = path.split('/{')[0]
-            if '{' in path and path_base in api_paths:
+            path_bases.append(path_base)
+            if '{' in path and path_base in api_path_set:
                 continue
             root_paths.add(path_base)
 
-        top_level_apis = self.__filter_top_level_apis__(root_paths)
+        base_path = self.__get_base_path__(root_paths)
 
-        return sorted(top_level_apis, key=self.__get_last_element__)
+        def get_resource(path_base):
+            if path_base.startswith(base_path):
+                path_base = path_base[len(base_path):]
+            return base_path + path_base.split('/')[0]
 
-    def __filter_top_level_apis__(self, root_paths):
-        """
-        Returns top level APIs
-        """
-        filtered_paths = set()
-        base_path = self.__get_base_path__(root_paths)
-        for path in root_paths:
-            resource = path.replace(base_path, '').split('/')[0]
-            filtered_paths.add(base_path + resource)
+        top_level_apis = set(get_resource(path) for path in root_paths)
+        resources = OrderedDict(
+            (resource, []) for resource in
+            sorted(top_level_apis, key=self.__get_last_element__))
+        for api, path_base in zip(apis, path_bases):
+            resource = get_resource(path_base)
+            if resource in resources:
+                resources[resource].append(api)
 
-        return list(filtered_paths)
+        return ResourceIndex(base_path, resources)
 
     def __get_base_path__(self, root_paths):
         base_path = os.path.commonprefix(root_paths)
@@ -107,25 +475,51 @@ class UrlParser(object):
         split_paths = paths.split('/')
         return split_paths[len(split_paths) - 1]
 
-    def __assemble_endpoint_data__(self, pattern, prefix='', filter_path=None):
+    def __match_filter_path__(self, simplified_path, filter_path):
+        """
+        Returns True if simplified_path is filter_path, or is found below it
+        """
+        filter_segments = split_path(filter_path)
+        path_segments = split_path(simplified_path)
+        return path_segments[:len(filter_segments)] == filter_segments
+
+    def __can_match_filter_path__(self, simplified_prefix, filter_path):
+        """
+        Returns False if no path starting with simplified_prefix can be
+        found below filter_path. The last segment of the prefix may be
+        completed by the patterns it includes.
+        """
+        filter_segments = split_path(filter_path)
+        prefix_segments = split_path(simplified_prefix)
+        complete, partial = prefix_segments[:-1], prefix_segments[-1]
+        if complete[:len(filter_segments)] != \
+                filter_segments[:len(complete)]:
+            return False
+        if len(complete) < len(filter_segments):
+            return filter_segments[len(complete)].startswith(partial)
+        return True
+
+    def __assemble_endpoint_data__(self, pattern, prefix='', filter_path=None,
+                                   namespaces=()):
         """
         Creates a dictionary for matched API urls
 
         pattern -- the pattern to parse
         prefix -- the API path prefix (used by recursion)
+        namespaces -- namespaces the pattern is included in (used by recursion)
         """
         callback = self.__get_pattern_api_callback__(pattern)
 
         if callback is None or self.__exclude_router_api_root__(callback):
             return
 
-        path = simplify_regex(prefix + pattern.regex.pattern)
+        simplified_path = simplify_regex(prefix + pattern.regex.pattern)
 
         if filter_path is not None:
-            if re.match('^/?%s(/.*)?$' % re.escape(filter_path), path) is None:
+            if not self.__match_filter_path__(simplified_path, filter_path):
                 return None
 
-        path = path.replace('<', '{').replace('>', '}')
+        path = simplified_path.replace('<', '{').replace('>', '}')
         path = self.__make_relative__(path)
 
         if self.__exclude_format_endpoints__(path):
@@ -135,46 +529,39 @@ class UrlParser(object):
             'path': path,
             'pattern': pattern,
             'callback': callback,
+            'namespaces': namespaces,
+            'simplified_path': simplified_path,
+            'path_parameters': self.__get_path_parameters__(
+                path, prefix + pattern.regex.pattern),
         }
 
+    def __get_path_parameters__(self, path, regex):
+        """
+        Returns the parameters found in path, typed after the named groups
+        of the regex it was simplified from
+        """
+        groups = get_named_groups(regex)
+        return [get_path_parameter(name, groups.get(name))
+                for name in re.findall('/{([^}]*)}', path)]
+
     def __flatten_patterns_tree__(self, patterns, prefix='', filter_path=None,
-                                  exclude_url_names=None, exclude_namespaces=None):
+                                  exclude_url_names=None, exclude_namespaces=None,
+                                  namespaces=()):
         """
-        Uses recursion to flatten url tree.
+        Flattens url tree into a list. See iter_endpoints.
 
         patterns -- urlpatterns list
         prefix -- (optional) Prefix for URL pattern
+        namespaces -- (optional) Namespaces the patterns are included in
         """
-        exclude_url_names = exclude_url_names or []
-        exclude_namespaces = exclude_namespaces or []
-        pattern_list = []
-
-        for pattern in patterns:
-            if isinstance(pattern, RegexURLPattern):
-                endpoint_data = self.__assemble_endpoint_data__(
-                    pattern, prefix, filter_path=filter_path)
-
-                if endpoint_data is None or pattern.name in exclude_url_names:
-                    continue
-
-                pattern_list.append(endpoint_data)
-
-            elif isinstance(pattern, RegexURLResolver):
-
-                if pattern.namespace is not None \
-                        and pattern.namespace in exclude_namespaces:
-                    continue
-
-                pref = prefix + pattern.regex.pattern
-                pattern_list.extend(self.__flatten_patterns_tree__(
-                    pattern.url_patterns,
-                    pref,
-                    filter_path=filter_path,
-                    exclude_url_names=exclude_url_names,
-                    exclude_namespaces=exclude_namespaces,
-                ))
-
-        return pattern_list
+        return list(self.iter_endpoints(
+            patterns,
+            prefix,
+            filter_path=filter_path,
+            exclude_url_names=exclude_url_names,
+            exclude_namespaces=exclude_namespaces,
+            namespaces=namespaces,
+        ))
 
     def __get_pattern_api_callback__(self, pattern):
         """
@@ -1,8 +1,11 @@
 from django.conf.urls import url
-from rest_framework_swagger.views import SwaggerApiView, SwaggerUIView
+from rest_framework_swagger.views import SwaggerApiView, SwaggerUIView, \
+    SwaggerResourcesView
 
 
 urlpatterns = [
     url(r'^$', SwaggerUIView.as_view(), name="django.swagger.base.view"),
     url(r'^api-docs/?$', SwaggerApiView.as_view(), name="django.swagger.resources.view"),
+    url(r'^api-docs/resources/?$', SwaggerResourcesView.as_view(), name="django.swagger.resource_list.view"),
+    url(r'^api-docs/resources/(?P<resource>.+?)/?$', SwaggerApiView.as_view(), name="django.swagger.resource.view"),
 ]
@@ -7,6 +7,11 @@ from django.utils.safestring import mark_safe
 from django.utils.encoding import smart_text
 from django.shortcuts import render_to_response, RequestContext
 from django.core.exceptions import PermissionDenied
+from django.contrib.auth.models import AnonymousUser
+from django.http import Http404, HttpRequest, HttpResponse, \
+    HttpResponseNotModified, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
 from .compat import import_string
 
 from rest_framework.views import Response
@@ -15,12 +20,17 @@ from rest_framework.utils import formatting
 
 from rest_framework_swagger.urlparser import UrlParser
 from rest_framework_swagger.apidocview import APIDocView
-from rest_framework_swagger.docgenerator import DocumentationGenerator
+from rest_framework_swagger.docgenerator import DocumentationGenerator, \
+    get_path_tags
+from rest_framework_swagger import speccache
 
 import rest_framework_swagger as rfs
 
 import copy
+import logging
 import re
+import threading
+logger = logging.getLogger(__name__)
 version_re = re.compile('v?(\d+(?:\.\d+)?)')
 
 try:
@@ -54,6 +64,54 @@ def get_full_base_path(request):
         return '{0}://{1}'.format(protocol, base_path.rstrip('/'))
 
 
+def get_content_response(content, content_type, chunk_size=64 * 1024):
+    """
+    Returns a response for content, which is streamed in chunks when it is
+    not a byte string (ie. a memory mapped file)
+    """
+    if isinstance(content, six.binary_type):
+        return HttpResponse(content, content_type=content_type)
+
+    chunks = (content[start:start + chunk_size]
+              for start in range(0, len(content), chunk_size))
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response['Content-Length'] = len(content)
+    return response
+
+
+def get_content_encoding(request, encodings):
+    """
+    Returns the preferred content coding, among encodings, that the
+    request's Accept-Encoding header allows. None stands for identity.
+    """
+    accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    qualities = {}
+    for item in accept_encoding.split(','):
+        params = item.split(';')
+        coding = params[0].strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params[1:]:
+            name, _, value = param.partition('=')
+            if name.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+
+    preferred = rfs.SWAGGER_SETTINGS.get('precompressed_encodings') or []
+    selected, selected_quality = None, 0.0
+    for encoding in preferred:
+        if encoding not in encodings:
+            continue
+        quality = qualities.get(encoding, qualities.get('*', 0.0))
+        if quality > selected_quality:
+            selected, selected_quality = encoding, quality
+    return selected
+
+
 class SwaggerUIView(View):
     def get(self, request, *args, **kwargs):
 
@@ -110,15 +168,297 @@ class SwaggerUIView(View):
         else:
             raise PermissionDenied()
 
+
 class SwaggerApiView(APIDocView):
     renderer_classes = (JSONRenderer, )
+    # Top level resource the document is restricted to, see
+    # SwaggerResourcesView
+    resource = None
 
     def get(self, request, *args, **kwargs):
         path = request.path
         path = path[:request.path.find('/api-docs')]
-        apis = self.get_apis(path)
-        generator = DocumentationGenerator(for_user=request.user)
+        self.resource = kwargs.get('resource', self.resource)
+        if self.resource is not None and not self.get_all_apis(path):
+            raise Http404()
+
+        spec_file = speccache.get_spec_file(path)
+        if spec_file is not None:
+            build = speccache.load_spec_file(spec_file)
+            if self.resource is not None:
+                build = self.get_resource_build(path, build)
+            if self.has_resource_access():
+                build = self.get_authorized_build(path, build)
+            return self.get_build_response(request, build)
+
+        if not speccache.is_cache_enabled():
+            apis = self.get_apis(path)
+            document = self.get_document(path, apis, for_user=request.user)
+            return self.get_build_response(
+                request, speccache.SpecBuild(document, JSONRenderer()))
+
+        urlconf = getattr(request, "urlconf", None)
+        key = speccache.get_cache_key(urlconf, path, self.resource)
+        max_age = rfs.SWAGGER_SETTINGS.get('cache_hard_timeout')
+        apis = None
+        if speccache.spec_cache.get(key, max_age=max_age) is None and \
+                not self.has_resource_access():
+            # The document may be in the shared cache, whose ETag is enough
+            # to tell that the client's copy is up to date
+            apis = self.get_all_apis(path)
+            shared_key = speccache.get_shared_cache_key(apis, path,
+                                                        self.resource)
+            validator = speccache.shared_spec_cache.get_validator(shared_key,
+                                                                  max_age)
+            if validator is not None and \
+                    self.is_not_modified(request, validator.etag):
+                return self.get_not_modified_build_response(request,
+                                                            validator)
+
+        build = self.get_cached_build(path, key, urlconf, apis)
+        if self.has_resource_access():
+            build = self.get_authorized_build(path, build)
+        return self.get_build_response(request, build)
+
+    def get_cached_build(self, path, key, urlconf=None, apis=None):
+        """
+        Returns the build cached under key, which is generated when it is
+        missing, unless another request or the warm up already is. Stale
+        builds are returned while they are generated again.
+        """
+        max_age = rfs.SWAGGER_SETTINGS.get('cache_hard_timeout')
+        timeout = rfs.SWAGGER_SETTINGS.get('cache_lease_timeout')
+        spec_cache = speccache.spec_cache
+        build = spec_cache.get(key, max_age=max_age)
+        started = False
+        while build is None and not started:
+            started = spec_cache.start_build(key)
+            if started:
+                break
+            # Another request or the warm up is building the document
+            build = spec_cache.get(key, wait=True, max_age=max_age,
+                                   timeout=timeout)
+            if build is None and spec_cache.is_pending(key):
+                # That build is stalled, generate the document here instead
+                break
+
+        if build is None:
+            try:
+                if apis is None:
+                    apis = self.get_all_apis(path)
+                shared_key = speccache.get_shared_cache_key(apis, path,
+                                                            self.resource)
+                build = self.get_shared_build(path, apis, shared_key,
+                                              max_age)
+            finally:
+                if started:
+                    spec_cache.finish_build(key, build)
+                elif build is not None:
+                    spec_cache.set(key, build)
+
+        if speccache.is_stale(build):
+            revalidate_cache(path, key, urlconf, self.resource)
+        return build
+
+    def has_resource_access(self):
+        return bool(rfs.SWAGGER_SETTINGS.get('resource_access_handler'))
+
+    def get_authorized_build(self, path, build):
+        """
+        Prunes a cached build, or a spec file, down to the paths the request
+        has access to. Only access decisions are made per request, the
+        document itself is generated once for every user.
+        """
+        allowed, denied = set(), set()
+        for api in self.get_all_apis(path):
+            if self.handle_resource_access(self.request, api['pattern']):
+                allowed.add(api['path'])
+            else:
+                denied.add(api['path'])
+        denied -= allowed
+        return build.get_pruned_build(denied, JSONRenderer())
+
+    def get_resource_build(self, path, build):
+        """
+        Prunes a build of every path found under path down to the paths of
+        the requested resource
+        """
+        paths = set(api['path'] for api in self.get_all_apis(path))
+        removed = set(build.document['paths']) - paths
+        return build.get_pruned_build(removed, JSONRenderer())
+
+    def get_shared_build(self, path, apis, shared_key, max_age=None):
+        """
+        Returns the build shared under shared_key, unless it is max_age
+        seconds old or more. Only the process holding its lease generates
+        it, while the others wait for the result.
+        """
+        shared_spec_cache = speccache.shared_spec_cache
+        build = shared_spec_cache.get(shared_key, max_age)
+        while build is None:
+            if not shared_spec_cache.acquire(shared_key):
+                build = shared_spec_cache.wait(shared_key, max_age=max_age)
+                continue
+            try:
+                partitions = speccache.partition_apis(apis)
+                document, path_definitions = self.get_partitioned_document(
+                    path, partitions, max_age)
+                build = speccache.SpecBuild(
+                    document, JSONRenderer(),
+                    rfs.SWAGGER_SETTINGS.get('precompressed_encodings'),
+                    path_definitions)
+                build.partitions = frozenset(partitions)
+                build.shared_key = shared_key
+                shared_spec_cache.set(shared_key, build)
+            finally:
+                shared_spec_cache.release(shared_key)
+        return build
+
+    def is_not_modified(self, request, etag):
+        """
+        Returns True when the request's If-None-Match header matches etag,
+        or the ETag of one of its encodings
+        """
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if not if_none_match:
+            return False
+        etags = parse_etags(if_none_match)
+        return '*' in etags or \
+            etag in [quote_etag(e.split('-', 1)[0]) for e in etags]
+
+    def get_not_modified_response(self, etag):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    def get_build_response(self, request, build):
+        if self.is_not_modified(request, build.etag):
+            return self.get_not_modified_build_response(request, build)
+
+        if not self.can_serve_content(request):
+            # Rendered again, and only semantically equivalent to the content
+            response = Response(build.document)
+            response['ETag'] = 'W/' + build.etag
+        else:
+            encoding = get_content_encoding(request, build.encodings)
+            response = get_content_response(
+                build.get_content(encoding), self.get_content_type(request))
+            response['ETag'] = build.get_etag(encoding)
+            if encoding is not None:
+                response['Content-Encoding'] = encoding
+            if build.encodings:
+                patch_vary_headers(response, ('Accept-Encoding',))
+        response['Age'] = str(build.get_age())
+        return response
+
+    def get_not_modified_build_response(self, request, validator):
+        """
+        Returns a 304 response with the headers the build of validator (a
+        SpecBuild or SpecValidator) would be served with
+        """
+        if not self.can_serve_content(request):
+            response = self.get_not_modified_response('W/' + validator.etag)
+        else:
+            encoding = get_content_encoding(request, validator.encodings)
+            response = self.get_not_modified_response(
+                validator.get_etag(encoding))
+            if validator.encodings:
+                patch_vary_headers(response, ('Accept-Encoding',))
+        response['Age'] = str(validator.get_age())
+        return response
+
+    def can_serve_content(self, request):
+        """
+        Pre-rendered content can be served as is, unless the client asked
+        for a different rendering (ie. `application/json; indent=4`)
+        """
+        return bool(rfs.SWAGGER_SETTINGS.get('prerender_response') and
+                    isinstance(request.accepted_renderer, JSONRenderer) and
+                    ';' not in request.accepted_media_type)
+
+    def get_content_type(self, request):
+        charset = request.accepted_renderer.charset
+        if charset:
+            return '%s; charset=%s' % (request.accepted_media_type, charset)
+        return request.accepted_media_type
+
+    def get_document(self, path, apis, for_user=None):
+        """
+        Generates the Swagger document for a list of APIs found under path.
+        The definitions of a resource document are only those of the
+        serializers its APIs use.
 
+        Cached documents are generated without a user, which makes
+        introspection fall back on the `unauthenticated_user` setting.
+        """
+        generator = DocumentationGenerator(for_user=for_user)
+        paths = generator.generate(apis)
+        return self.assemble_document(
+            path, paths, generator.get_models(apis))
+
+    def generate_document(self, path, apis, for_user=None):
+        """
+        Generates the Swagger document like get_document does, and returns
+        it along with the names of the definitions each of its paths uses
+        """
+        generator = DocumentationGenerator(for_user=for_user)
+        paths = generator.generate(apis)
+        definitions = generator.get_models(apis)
+        document = self.assemble_document(path, paths, definitions)
+        return document, generator.get_path_definitions(apis, paths,
+                                                        definitions)
+
+    def get_partitioned_document(self, path, partitions, max_age=None):
+        """
+        Assembles the document from the paths and definitions of each
+        partition of APIs, as returned by speccache.partition_apis. These
+        are cached separately, and shared along with documents, so that only
+        the partitions which are missing or max_age seconds old or more are
+        generated.
+
+        Returns the document, along with the names of the definitions each
+        of its paths uses.
+        """
+        spec_cache = speccache.spec_cache
+        shared_spec_cache = speccache.shared_spec_cache
+        generations = shared_spec_cache.get_generations(partitions)
+        paths, definitions, path_definitions = {}, {}, {}
+        for namespace, apis in partitions.items():
+            key = speccache.get_partition_key(
+                apis, path, namespace, generations.get(namespace, 0))
+            shared_key = speccache.get_shared_partition_key(key)
+            partition = spec_cache.get(key, max_age=max_age)
+            if partition is None:
+                partition = shared_spec_cache.get(shared_key, max_age)
+                if partition is not None:
+                    spec_cache.set(key, partition)
+            if partition is None:
+                generator = DocumentationGenerator()
+                partition_paths = generator.generate(apis)
+                partition_definitions = generator.get_models(apis)
+                partition = speccache.SpecPartition(
+                    namespace, partition_paths, partition_definitions,
+                    generator.get_path_definitions(
+                        apis, partition_paths, partition_definitions))
+                spec_cache.set(key, partition)
+                shared_spec_cache.set(shared_key, partition)
+            paths.update(partition.paths)
+            definitions.update(partition.definitions)
+            path_definitions.update(partition.path_definitions)
+        document = self.assemble_document(path, paths, definitions)
+        return document, path_definitions
+
+    def assemble_document(self, path, paths, definitions):
+        return {
+            'swagger': '2.0',
+            'basePath': path,
+            'paths': paths,
+            'definitions': definitions,
+            'info': self.get_info(path),
+            'tags': rfs.SWAGGER_SETTINGS.get('tags', [])
+        }
+
+    def get_info(self, path):
         info = copy.deepcopy(rfs.SWAGGER_SETTINGS.get('info', {
             'contact': {},
             'description': '',
@@ -133,16 +473,19 @@ class SwaggerApiView(APIDocView):
             if matches is not None:
                 info['version'] = matches.groups()[0]
 
-        return Response({
-            'swagger': '2.0',
-            'basePath': path,
-            'paths': generator.generate(apis),
-            'definitions': generator.get_models(apis),
-            'info': info,
-            'tags': rfs.SWAGGER_SETTINGS.get('tags', [])
-        })
+        return info
 
     def get_apis(self, path):
+        apis = self.get_all_apis(path)
+        authorized_apis = filter(lambda a: self.handle_resource_access(self.request, a['pattern']), apis)
+        authorized_apis_list = list(authorized_apis)
+        return authorized_apis_list
+
+    def get_all_apis(self, path):
+        """
+        Returns the APIs found under path, or in the requested resource,
+        regardless of resource access
+        """
         urlparser = UrlParser()
         urlconf = getattr(self.request, "urlconf", None)
         exclude_url_names = rfs.SWAGGER_SETTINGS.get('exclude_url_names')
@@ -150,7 +493,205 @@ class SwaggerApiView(APIDocView):
         apis = urlparser.get_apis(urlconf=urlconf, filter_path=path,
                                   exclude_url_names=exclude_url_names,
                                   exclude_namespaces=exclude_namespaces)
-        authorized_apis = filter(lambda a: self.handle_resource_access(self.request, a['pattern']), apis)
-        authorized_apis_list = list(authorized_apis)
-        return authorized_apis_list
+        if self.resource is not None:
+            apis = urlparser.get_resource_index(apis).get_apis(self.resource)
+        return apis
+
+
+class SwaggerResourcesView(SwaggerApiView):
+    """
+    Lists the top level resources of the API, along with the URL of the
+    document of each of them and the tags of their operations. Unlike the
+    document of the whole API, these are generated and cached one resource
+    at a time.
+
+    The tags are read from the cached document, or the spec file, and the
+    listing is cached along with it.
+    """
+    def get(self, request, *args, **kwargs):
+        path = request.path
+        path = path[:request.path.find('/api-docs')]
+
+        # Resources are named after every API, like the documents they link
+        # to, and only those the request has access to are listed
+        apis = self.get_all_apis(path)
+        index = UrlParser().get_resource_index(apis)
+        urlconf = getattr(request, "urlconf", None)
+        key = speccache.get_cache_key(urlconf, path)
+
+        spec_file = speccache.get_spec_file(path)
+        if spec_file is not None:
+            source = speccache.load_spec_file(spec_file)
+        elif speccache.is_cache_enabled():
+            source = self.get_cached_build(path, key, urlconf)
+        else:
+            source = None
+
+        if source is None:
+            # Introspected as the requesting user, like the document
+            generator = DocumentationGenerator(for_user=request.user)
+            build = self.get_resources_build(
+                path, index, generator.get_path_tags(apis))
+        else:
+            build = self.get_cached_resources_build(path, index, key, source)
+
+        if self.has_resource_access():
+            build = self.get_authorized_resources_build(path, build)
+        return self.get_build_response(request, build)
+
+    def get_cached_resources_build(self, path, index, key, source):
+        """
+        Returns the listing of the resources of a cached build or spec file,
+        which is kept until that build is replaced
+        """
+        key = ('resources',) + key
+        spec_cache = speccache.spec_cache
+        build = spec_cache.get(key)
+        if build is None or build.source_etag != source.etag:
+            build = self.get_resources_build(
+                path, index, get_path_tags(source.document),
+                rfs.SWAGGER_SETTINGS.get('precompressed_encodings'))
+            build.source_etag = source.etag
+            spec_cache.set(key, build)
+        return build
+
+    def get_authorized_resources_build(self, path, build):
+        """
+        Leaves out of a listing the resources whose paths are all denied,
+        and the tags only those paths use
+        """
+        allowed, denied = set(), set()
+        for api in self.get_all_apis(path):
+            if self.handle_resource_access(self.request, api['pattern']):
+                allowed.add(api['path'])
+            else:
+                denied.add(api['path'])
+        if not denied - allowed:
+            return build
+        return self.get_resources_build(path, build.index, build.path_tags,
+                                        allowed=allowed)
+
+    def get_resources_build(self, path, index, path_tags, encodings=None,
+                            allowed=None):
+        """
+        Builds the listing of the resources of index.
+
+        path_tags -- names of the tags each path uses
+        allowed -- paths the request has access to, defaults to every path
+        """
+        tags = list(rfs.SWAGGER_SETTINGS.get('tags', []))
+        tag_names = [tag.get('name') for tag in tags]
+        resources = []
+        for resource in index.get_resources():
+            paths = [api['path'] for api in index.get_apis(resource)
+                     if allowed is None or api['path'] in allowed]
+            if not paths:
+                continue
+            resource_tags = []
+            for resource_path in paths:
+                for tag in path_tags.get(resource_path, []):
+                    if tag not in resource_tags:
+                        resource_tags.append(tag)
+            resources.append({
+                'name': resource,
+                'url': '%s/api-docs/resources/%s' % (path, resource),
+                'tags': resource_tags,
+            })
+            for tag in resource_tags:
+                if tag not in tag_names:
+                    tag_names.append(tag)
+                    tags.append({'name': tag})
+
+        document = {
+            'swagger': '2.0',
+            'basePath': path,
+            'info': self.get_info(path),
+            'tags': tags,
+            'resources': resources,
+        }
+        build = speccache.SpecBuild(document, JSONRenderer(), encodings)
+        build.index = index
+        build.path_tags = path_tags
+        return build
+
+
+def get_offline_view(path, user=None, urlconf=None, resource=None):
+    """
+    Returns a SwaggerApiView documenting the APIs under path outside of a
+    request cycle, ie. from a management command.
+
+    path -- path the documentation is served under
+    user -- user resource access is checked for (optional)
+    urlconf -- urlconf to document (optional)
+    resource -- top level resource to restrict the document to (optional)
+    """
+    request = HttpRequest()
+    request.path = path + '/api-docs'
+    request.user = user or AnonymousUser()
+    if urlconf is not None:
+        request.urlconf = urlconf
+
+    view = SwaggerApiView()
+    view.request = request
+    view.resource = resource
+    return view
+
+
+def warm_up_cache(paths):
+    """
+    Builds the documents served under paths in a background thread.
+    Requests for them wait for the build rather than start their own.
+    """
+    builds = []
+    for path in paths:
+        key = speccache.get_cache_key(None, path)
+        if speccache.spec_cache.start_build(key):
+            builds.append((path, key))
+
+    thread = threading.Thread(target=_warm_up_cache, args=(builds,),
+                              name='rest_framework_swagger.warm_up_cache')
+    thread.daemon = True
+    thread.start()
+    return thread
+
+
+def revalidate_cache(path, key, urlconf=None, resource=None):
+    """
+    Generates a stale document again in a background thread. The stale one
+    keeps being served until the new build replaces it.
+
+    Returns the thread, or None when the document is already being built.
+    After a failed build, it is not generated again before another
+    `cache_soft_timeout`.
+    """
+    max_age = rfs.SWAGGER_SETTINGS.get('cache_soft_timeout')
+    failure_age = speccache.spec_cache.get_failure_age(key)
+    if failure_age is not None and max_age is not None and \
+            failure_age < max_age:
+        return None
+
+    if not speccache.spec_cache.start_build(key):
+        return None
+
+    thread = threading.Thread(target=_warm_up_cache,
+                              args=([(path, key)], urlconf, max_age,
+                                    resource),
+                              name='rest_framework_swagger.revalidate_cache')
+    thread.daemon = True
+    thread.start()
+    return thread
+
 
+def _warm_up_cache(builds, urlconf=None, max_age=None, resource=None):
+    for path, key in builds:
+        build = None
+        try:
+            view = get_offline_view(path, urlconf=urlconf, resource=resource)
+            apis = view.get_all_apis(path)
+            shared_key = speccache.get_shared_cache_key(apis, path, resource)
+            build = view.get_shared_build(path, apis, shared_key, max_age)
+        except Exception:
+            logger.exception("Could not build the documentation of '%s'",
+                             path)
+        finally:
+            speccache.spec_cache.finish_build(key, build)
@@ -62,6 +62,7 @@ setup(
     install_requires=install_requires,
     extras_require = {
         'reST': ['docutils>=0.8'],
+        'brotli': ['brotli'],
     },
 
     author='Marc Gibbons',